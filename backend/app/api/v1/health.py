@@ -1,7 +1,19 @@
 from fastapi import APIRouter
 
+from app.core import metrics
+
 router = APIRouter(tags=["health"])
 
 @router.get("/health", summary="Health check")
 def health_check():
     return {"status": "ok"}
+
+
+@router.get("/metrics", summary="In-process service metrics (JSON)")
+def get_metrics():
+    """
+    Counters / timings recorded by the services plus live stats from
+    registered collectors (e.g. `llm` → per-provider latency, errors,
+    circuit breaker state).
+    """
+    return metrics.snapshot()
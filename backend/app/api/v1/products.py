@@ -1,32 +1,199 @@
 # app/api/v1/product.py
-from typing import List, Optional
+from typing import List, Literal, Optional, Union
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from app.db.session import get_db
-from app.schemas.product import ProductOut, ProductCreate, ProductUpdate
+from app.core import http_cache
+from app.core.config import settings
+from app.core.responses import ORJSONResponse
+from app.db.session import get_async_db, get_db
+from app.schemas.product import (
+    ComplementOut,
+    ProductCreate,
+    ProductOut,
+    ProductBatch,
+    ProductBatchRequest,
+    ProductCard,
+    ProductCardPage,
+    ProductPage,
+    ProductUpdate,
+)
+from app.services import complements as complement_service
+from app.services import export as export_service
 from app.services import products as product_service
 
-router = APIRouter(prefix="/products", tags=["products"])
+router = APIRouter(
+    prefix="/products",
+    tags=["products"],
+    # orjson for everything this router renders (see app/core/responses.py)
+    default_response_class=ORJSONResponse,
+)
+
+
+def _parse_fields(fields: str) -> List[str]:
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in product_service.PROJECTABLE_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Unknown fields {unknown}; allowed: "
+                f"{', '.join(product_service.PROJECTABLE_FIELDS)}"
+            ),
+        )
+    return ["id", *[f for f in requested if f != "id"]]
 
 
 @router.get(
     "/",
-    response_model=List[ProductOut],
+    response_model=Union[List[ProductOut], ProductPage, List[ProductCard], ProductCardPage],
     status_code=status.HTTP_200_OK,
 )
-def list_products(
+async def list_products(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(20, ge=1, le=100),
     category: Optional[str] = Query(None, max_length=100),
-    db: Session = Depends(get_db),
+    paginate: Literal["offset", "cursor"] = Query("offset"),
+    cursor: Optional[str] = Query(None, max_length=512),
+    view: Literal["full", "card"] = Query("full"),
+    fields: Optional[str] = Query(None, max_length=200),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     List products with optional category filter.
     Ye endpoint hi frontend ke HomePage se hit ho raha hai.
+
+    - paginate=offset (default): plain list, `skip` / `limit` (old clients)
+    - paginate=cursor (or any `cursor` given): {"items", "next_cursor"};
+      pass next_cursor back as `cursor` for the next page
+    - view=card: compact ProductCard items (id/title/price/image/category)
+    - fields=title,price,...: only those keys (id always included);
+      only the requested columns are SELECTed
+
+    Sends ETag / Last-Modified from the catalog version; a matching
+    If-None-Match / If-Modified-Since gets an empty 304.
+    """
+    columns = _parse_fields(fields) if fields else None
+    if columns is None and view == "card":
+        columns = list(product_service.CARD_FIELDS)
+
+    version, last_modified = await http_cache.catalog_version_async(db)
+    etag = http_cache.make_etag(
+        "products", version, skip, limit, category, paginate, cursor, view, columns
+    )
+    headers = http_cache.cache_headers(
+        etag, last_modified, settings.HTTP_CACHE_LIST_MAX_AGE_SECONDS
+    )
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.not_modified(headers)
+    response.headers.update(headers)
+
+    cursor_mode = paginate == "cursor" or bool(cursor)
+    if cursor_mode:
+        items, next_cursor = await product_service.list_products_keyset_async(
+            db, limit=limit, category=category, cursor=cursor, columns=columns
+        )
+    else:
+        items = await product_service.list_products_async(
+            db, skip=skip, limit=limit, category=category, columns=columns
+        )
+        next_cursor = None
+
+    if fields:
+        # ad-hoc projection: no fixed model, serialise just these keys
+        rows = [{c: getattr(p, c) for c in columns} for p in items]
+        payload = {"items": rows, "next_cursor": next_cursor} if cursor_mode else rows
+        return ORJSONResponse(content=payload, headers=headers)
+    if view == "card":
+        cards = [ProductCard.model_validate(p) for p in items]
+        return ProductCardPage(items=cards, next_cursor=next_cursor) if cursor_mode else cards
+    return ProductPage(items=items, next_cursor=next_cursor) if cursor_mode else items
+
+
+def _check_batch_size(ids: List[int]) -> None:
+    if len(ids) > settings.PRODUCT_BATCH_MAX_IDS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"At most {settings.PRODUCT_BATCH_MAX_IDS} ids per request",
+        )
+
+
+# NOTE: declared before "/{product_id}", otherwise "export" / "batch" hit that route
+@router.get("/export", status_code=status.HTTP_200_OK)
+def export_products(
+    fmt: Literal["ndjson", "csv", "parquet"] = Query("ndjson", alias="format"),
+    category: Optional[str] = Query(None, max_length=100),
+    include_vectors: bool = Query(False, description="Add each product's embedding from Qdrant"),
+):
+    """
+    Whole catalog (or one category) as a download for analytics, streamed
+    in batches from a server-side cursor — constant memory, so it works
+    for millions of rows. Parquet needs pyarrow on the server.
     """
-    return product_service.list_products(db, skip=skip, limit=limit, category=category)
+    if fmt == "parquet" and not export_service.parquet_available():
+        raise HTTPException(
+            status_code=status.HTTP_501_NOT_IMPLEMENTED,
+            detail="Parquet export needs pyarrow installed on the server",
+        )
+    media_type, extension = export_service.EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        export_service.export_products(
+            fmt, category=category, include_vectors=include_vectors
+        ),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="products.{extension}"'},
+    )
+
+
+@router.get(
+    "/batch",
+    response_model=ProductBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def get_products_batch(
+    ids: str = Query(..., min_length=1, description="Comma-separated ids, e.g. 3,1,7"),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Many products in one request (chat results, wishlists) instead of N
+    calls to /products/{id}. Order follows `ids`; unknown ids come back
+    in `missing_ids`.
+    """
+    try:
+        id_list = [int(part) for part in ids.split(",") if part.strip()]
+    except ValueError:
+        id_list = []
+    if not id_list:
+        # "?ids=" / "?ids=," → 422, like an empty POST body list
+        raise HTTPException(
+            status_code=422,
+            detail="ids must be comma-separated integers",
+        )
+    _check_batch_size(id_list)
+    items, missing = await product_service.get_products_batch_async(db, id_list)
+    return ProductBatch(items=items, missing_ids=missing)
+
+
+@router.post(
+    "/batch",
+    response_model=ProductBatch,
+    status_code=status.HTTP_200_OK,
+)
+async def post_products_batch(
+    batch_in: ProductBatchRequest = Body(...),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Same as GET /products/batch, for id lists too long for a URL.
+    """
+    _check_batch_size(batch_in.ids)
+    items, missing = await product_service.get_products_batch_async(db, batch_in.ids)
+    return ProductBatch(items=items, missing_ids=missing)
 
 
 @router.get(
@@ -34,15 +201,50 @@ def list_products(
     response_model=ProductOut,
     status_code=status.HTTP_200_OK,
 )
-def get_product(
+async def get_product(
     product_id: int,
-    db: Session = Depends(get_db),
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Get single product by DB id.
     Chat page ya detail page ke kaam ka.
+    ETag / Last-Modified from updated_at (304 when unchanged).
     """
-    return product_service.get_product(db, product_id=product_id)
+    product, last_modified = await product_service.get_product_with_changed_at_async(
+        db, product_id=product_id
+    )
+    etag = http_cache.make_etag("product", product.id, last_modified)
+    headers = http_cache.cache_headers(
+        etag, last_modified, settings.HTTP_CACHE_DETAIL_MAX_AGE_SECONDS
+    )
+    if http_cache.is_not_modified(request, etag, last_modified):
+        return http_cache.not_modified(headers)
+    response.headers.update(headers)
+    return product
+
+
+@router.get(
+    "/{product_id}/complete-the-look",
+    response_model=List[ComplementOut],
+    status_code=status.HTTP_200_OK,
+)
+def complete_the_look(
+    product_id: int,
+    limit: int = Query(6, ge=1, le=20),
+    db: Session = Depends(get_db),
+):
+    """
+    Cross-category suggestions (hoodie → joggers, co-ord sets...) for the
+    detail page. Precomputed by compute_complements.py, so this is one
+    indexed read; empty list if the job hasn't covered this product yet.
+    """
+    rows = complement_service.get_complete_the_look(db, product_id=product_id, limit=limit)
+    return [
+        ComplementOut(**ProductOut.model_validate(product).model_dump(), score=round(score, 4))
+        for product, score in rows
+    ]
 
 
 @router.post(
@@ -50,14 +252,14 @@ def get_product(
     response_model=ProductOut,
     status_code=status.HTTP_201_CREATED,
 )
-def create_product(
+async def create_product(
     product_in: ProductCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Manually product create karne ke liye (ya scraper yahi call kare).
     """
-    return product_service.create_product(db, product_in=product_in)
+    return await product_service.create_product_async(db, product_in=product_in)
 
 
 @router.patch(
@@ -65,12 +267,14 @@ def create_product(
     response_model=ProductOut,
     status_code=status.HTTP_200_OK,
 )
-def update_product(
+async def update_product(
     product_id: int,
     product_in: ProductUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
 ):
     """
     Product update endpoint.
     """
-    return product_service.update_product(db, product_id=product_id, product_in=product_in)
+    return await product_service.update_product_async(
+        db, product_id=product_id, product_in=product_in
+    )
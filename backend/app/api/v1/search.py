@@ -1,20 +1,28 @@
 # app/api/v1/search.py
 from typing import List, Dict, Any, Set
+import logging
 import re
 
 from fastapi import APIRouter, Depends, Query
 from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
+from app.core.responses import ORJSONResponse
 from app.db.session import get_db
+from app.schemas.search import SearchHit
 from app.services.embeddings import semantic_search
-from app.services.llm import answer_with_rag
+from app.core import metrics
+from app.core.config import settings
+from app.services.lexical_search import lexical_search
+from app.services.llm import recommend_with_rag
+from app.services.rag_context import build_rag_context
 from app.services.graph import (
-    get_kg_context_for_products,
+    get_kg_context_by_product,
     get_candidate_product_ids_from_kg,
 )
 
-router = APIRouter(tags=["search"])
+router = APIRouter(tags=["search"], default_response_class=ORJSONResponse)
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------
@@ -146,7 +154,7 @@ class SearchRequest(BaseModel):
     query: str
 
 
-def _compute_mention_bonus(prod: Dict[str, Any], answer_text: str) -> float:
+def _compute_mention_bonus(prod: SearchHit, answer_text: str) -> float:
     """
     Give extra score if product title/category words appear in LLM answer.
     This forces the items the bot explicitly talks about to the top.
@@ -155,8 +163,8 @@ def _compute_mention_bonus(prod: Dict[str, Any], answer_text: str) -> float:
         return 0.0
 
     ans = answer_text.lower()
-    title = (prod.get("title") or "").lower()
-    category = (prod.get("category") or "").lower()
+    title = prod.title.lower()
+    category = prod.category.lower()
 
     bonus = 0.0
 
@@ -177,6 +185,41 @@ def _compute_mention_bonus(prod: Dict[str, Any], answer_text: str) -> float:
     return bonus
 
 
+def _lexical_hits(query: str, db: Session, max_price: float | None) -> List[Dict[str, Any]]:
+    try:
+        return lexical_search(
+            db, query, limit=settings.SEARCH_LEXICAL_LIMIT, max_price=max_price
+        )
+    except Exception as e:
+        # e.g. migration 0004 not applied yet — lexical stage is optional
+        db.rollback()
+        logger.warning(f"Lexical search failed: {e}")
+        metrics.inc("search.lexical_failures")
+        return []
+
+
+def _merge_lexical(
+    product_map: Dict[int, SearchHit],
+    lexical: List[Dict[str, Any]],
+) -> None:
+    """
+    Fuse full-text hits into product_map in place:
+    score += SEARCH_LEXICAL_WEIGHT * (ts_rank / best ts_rank).
+    Lexical-only products enter with just that term.
+    """
+    if not lexical:
+        return
+    best = max(hit["rank"] for hit in lexical) or 1.0
+    for hit in lexical:
+        boost = settings.SEARCH_LEXICAL_WEIGHT * (hit["rank"] / best)
+        pid = hit["id"]
+        if pid in product_map:
+            product_map[pid].score += boost
+        else:
+            fields = {k: v for k, v in hit.items() if k != "rank"}
+            product_map[pid] = SearchHit(**fields, score=boost)
+
+
 def _run_search(query: str, db: Session) -> Dict[str, Any]:
     # 1) Understand intent from the query
     intent_category = detect_intent_category(query)          # e.g. "hoodie"
@@ -201,9 +244,24 @@ def _run_search(query: str, db: Session) -> Dict[str, Any]:
             # If KG is off / down, don't break search – just skip KG filter.
             kg_candidate_ids = set()
 
-    # 3) Vector search in Qdrant (semantic layer)
-    points = semantic_search(enriched_query, limit=20)
-    if not points:
+    # 3) Vector search in Qdrant (semantic layer). If Qdrant / the
+    #    embedder is down we carry on with the lexical stage alone.
+    try:
+        points = semantic_search(enriched_query, limit=20)
+    except Exception as e:
+        logger.error(f"Vector search failed, using lexical search only: {e}")
+        metrics.inc("search.vector_failures")
+        points = []
+
+    # 3b) Postgres full-text (lexical) stage: merged with vector hits, or
+    #     only as a fallback, per SEARCH_LEXICAL_MODE
+    lexical_mode = settings.SEARCH_LEXICAL_MODE.lower()
+    lexical: List[Dict[str, Any]] = []
+    if lexical_mode == "merge" or (lexical_mode == "fallback" and not points):
+        lexical = _lexical_hits(query, db, max_price)
+        metrics.observe("search.lexical_hits", len(lexical))
+
+    if not points and not lexical:
         msg = "I couldn't find any relevant products."
         if intent_category:
             msg = (
@@ -212,9 +270,7 @@ def _run_search(query: str, db: Session) -> Dict[str, Any]:
             )
         return {"answer": msg, "results": []}
 
-    rag_chunks: List[str] = []
-    product_map: Dict[int, Dict[str, Any]] = {}
-    product_scores: List[tuple[int, float]] = []
+    product_map: Dict[int, SearchHit] = {}
 
     for p in points:
         payload = p.payload or {}
@@ -226,46 +282,35 @@ def _run_search(query: str, db: Session) -> Dict[str, Any]:
         category = payload.get("category") or ""
         price = payload.get("price")
         description = payload.get("description") or ""
+        summary = payload.get("stylist_summary") or ""
         image_url = payload.get("image_url") or ""
         product_url = payload.get("product_url") or ""
-        chunk_text = payload.get("chunk_text") or ""
 
         score = float(p.score or 0.0)
 
-        # Build RAG context out of all relevant chunks
-        rag_chunks.append(
-            f"Title: {title}\n"
-            f"Category: {category}\n"
-            f"Price: {price}\n"
-            f"Description: {description}\n"
-            f"Snippet: {chunk_text}"
-        )
-
         # Keep best score per product
-        if pid not in product_map or score > product_map[pid]["score"]:
-            product_map[pid] = {
-                "id": pid,
-                "title": title,
-                "category": category,
-                "price": price,
-                "description": description,
-                "image_url": image_url,
-                "product_url": product_url,
-                "score": score,
-            }
-
-        product_scores.append((pid, score))
+        if pid not in product_map or score > product_map[pid].score:
+            product_map[pid] = SearchHit(
+                id=pid,
+                title=title,
+                category=category,
+                price=price,
+                description=description,
+                summary=summary,
+                image_url=image_url,
+                product_url=product_url,
+                score=score,
+            )
+
+    _merge_lexical(product_map, lexical)
 
     if not product_map:
         return {"answer": "I couldn't find any relevant products.", "results": []}
 
-    # 4) Order products by raw semantic score
-    ordered_ids: List[int] = []
-    seen_ids: Set[int] = set()
-    for pid, _ in sorted(product_scores, key=lambda x: -x[1]):
-        if pid not in seen_ids:
-            ordered_ids.append(pid)
-            seen_ids.add(pid)
+    # 4) Order products by (fused) score
+    ordered_ids: List[int] = sorted(
+        product_map, key=lambda pid: -product_map[pid].score
+    )
 
     # 4b) HYBRID: if KG returned candidates, restrict to them.
     #     This is where Neo4j actually influences what we surface.
@@ -277,23 +322,36 @@ def _run_search(query: str, db: Session) -> Dict[str, Any]:
 
     base_results = [product_map[pid] for pid in ordered_ids]
 
-    # 5) Add KG conceptual context for these products for RAG
-    kg_chunks = get_kg_context_for_products(ordered_ids)
-    rag_chunks.extend(kg_chunks)
-
-    # 6) Ask LLM to synthesize an answer
-    answer = answer_with_rag(query, rag_chunks)
+    # 5) One compact RAG record per product (payload + KG facts merged),
+    #    best score first, filled up to the token budget
+    try:
+        kg_context = get_kg_context_by_product(ordered_ids)
+    except Exception:
+        kg_context = {}
+    rag_chunks, context_tokens = build_rag_context(base_results, kg_context)
+    metrics.observe("rag.context_tokens", context_tokens)
+    metrics.observe("rag.context_products", len(rag_chunks))
+
+    # 6) Ask LLM for a structured answer: text + recommended product ids
+    answer, recommended_ids = recommend_with_rag(query, rag_chunks, ordered_ids)
     answer_text = answer or ""
-    answer_lower = answer_text.lower()
 
-    # 7) Re-rank products so the ones explicitly mentioned by LLM
-    #    (by title / category) float to the top.
-    def final_score(prod: Dict[str, Any]) -> float:
-        base = float(prod.get("score") or 0.0)
-        bonus = _compute_mention_bonus(prod, answer_lower)
-        return base + bonus
+    # 7) Re-rank: products the LLM recommended come first, in its order.
+    #    If the structured payload was unusable, fall back to the
+    #    title / category mention heuristic on the answer text.
+    if recommended_ids:
+        rank = {pid: i for i, pid in enumerate(recommended_ids)}
+        reranked_results = sorted(
+            base_results,
+            key=lambda prod: (rank.get(prod.id, len(rank)), -prod.score),
+        )
+    else:
+        answer_lower = answer_text.lower()
+
+        def final_score(prod: SearchHit) -> float:
+            return prod.score + _compute_mention_bonus(prod, answer_lower)
 
-    reranked_results = sorted(base_results, key=final_score, reverse=True)
+        reranked_results = sorted(base_results, key=final_score, reverse=True)
 
     # 8) Keep only top-N for UI cleanliness
     TOP_N = 6
@@ -310,7 +368,9 @@ def search_products(
     query: str = Query(..., description="User question or search query"),
     db: Session = Depends(get_db),
 ):
-    return _run_search(query, db)
+    # returned as a response directly: hits are dataclasses, orjson
+    # serialises them as-is (no jsonable_encoder pass)
+    return ORJSONResponse(_run_search(query, db))
 
 
 @router.post(
@@ -324,4 +384,4 @@ def search_products_post(
     """
     POST variant so the frontend can send JSON: { "query": "hoodies under 2000" }.
     """
-    return _run_search(body.query, db)
+    return ORJSONResponse(_run_search(body.query, db))
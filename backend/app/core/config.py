@@ -1,14 +1,40 @@
 # app/core/config.py
+from pathlib import Path
+
+from pydantic import field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+# backend/ — relative file paths in settings resolve against this, not
+# against whatever directory uvicorn / a script was started from
+BACKEND_DIR = Path(__file__).resolve().parents[2]
+
 
 class Settings(BaseSettings):
     # Project basics
     PROJECT_NAME: str = "Product Discovery Assistant"
     API_V1_PREFIX: str = "/api/v1"
+    # HTTP caching of product endpoints (ETag / 304) + response compression
+    HTTP_CACHE_LIST_MAX_AGE_SECONDS: int = 60
+    HTTP_CACHE_DETAIL_MAX_AGE_SECONDS: int = 300
+    COMPRESSION_MIN_SIZE: int = 1024
+    # GET /products/export: rows per server-side cursor fetch / streamed chunk
+    EXPORT_BATCH_SIZE: int = 1000
+    # Batch fetch (GET/POST /products/batch) + in-memory hot-product cache
+    PRODUCT_BATCH_MAX_IDS: int = 100
+    PRODUCT_CACHE_SIZE: int = 2000
+    PRODUCT_CACHE_TTL_SECONDS: int = 60
 
     # Database (Neon Postgres)
     DATABASE_URL: str
+    # Connection pools (sync engine and the async asyncpg engine each get one)
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 10.0
+    # recycle before Neon drops idle connections (~5 min)
+    DB_POOL_RECYCLE_SECONDS: int = 280
+    DB_POOL_PRE_PING: bool = False
+    DB_SSL: str = "require"
+    DB_STATEMENT_CACHE_SIZE: int = 100
 
     # Qdrant (vector DB)
     QDRANT_URL: str
@@ -19,9 +45,77 @@ class Settings(BaseSettings):
     BGE_MODEL_NAME: str = "sentence-transformers/all-MiniLM-L6-v2"
     EMBEDDING_DIM: int = 384
 
+    # Startup: one streamed pass over products feeds Qdrant + KG (rows per batch)
+    CATALOG_SYNC_BATCH_SIZE: int = 256
+
+    # Write-through indexing: product create/update → product_outbox →
+    # background worker (Qdrant + KG), batched, with exponential backoff
+    OUTBOX_WORKER_ENABLED: bool = True
+    OUTBOX_BATCH_SIZE: int = 64
+    OUTBOX_POLL_SECONDS: float = 2.0
+    OUTBOX_MAX_ATTEMPTS: int = 8
+    OUTBOX_RETRY_BASE_SECONDS: float = 5.0
+    OUTBOX_RETRY_MAX_SECONDS: float = 600.0
+
     # LLMs
-    GROQ_API_KEY: str
-    OPENAI_API_KEY: str
+    # Ordered fallback chain; providers: groq, openai, standin
+    # (standin = local OpenAI-compatible server from loadtest/llm_standin.py)
+    LLM_PROVIDERS: str = "groq,openai"
+    GROQ_API_KEY: str | None = None
+    OPENAI_API_KEY: str | None = None
+    GROQ_MODEL: str = "llama-3.1-8b-instant"   # 🚀 fastest, cheaper
+    OPENAI_MODEL: str = "gpt-4.1-mini"         # light fallback
+    LLM_STANDIN_URL: str = "http://127.0.0.1:8099/v1"
+
+    # LLM resilience (Groq → OpenAI chain)
+    # Per-request timeout; SDK-level retries are off because the circuit
+    # breaker + fallback chain already handles failures.
+    LLM_TIMEOUT_SECONDS: float = 12.0
+    LLM_MAX_RETRIES: int = 0
+    # Breaker opens after N consecutive failures and lets one probe
+    # request through once the cooldown is over (half-open).
+    LLM_BREAKER_FAILURE_THRESHOLD: int = 3
+    LLM_BREAKER_COOLDOWN_SECONDS: float = 30.0
+    # Hedged mode: if the primary hasn't answered after the delay,
+    # fire the fallback too and take whichever answers first.
+    LLM_HEDGE_ENABLED: bool = False
+    LLM_HEDGE_DELAY_SECONDS: float = 2.0
+    # Concurrent /search LLM calls expected per process; the hedge pool gets
+    # this many threads per provider so hedges never queue behind each other
+    LLM_HEDGE_MAX_CONCURRENCY: int = 16
+
+    # Postgres full-text stage of /search: "merge" (always, fused with
+    # vector hits), "fallback" (only if vector search fails / is empty), "off"
+    SEARCH_LEXICAL_MODE: str = "merge"
+    SEARCH_LEXICAL_LIMIT: int = 20
+    # fused score = vector score + WEIGHT * (ts_rank / best ts_rank)
+    SEARCH_LEXICAL_WEIGHT: float = 0.3
+
+    # RAG prompt size (one compact record per product, filled to budget)
+    RAG_CONTEXT_TOKEN_BUDGET: int = 1200
+    RAG_DESCRIPTION_MAX_CHARS: int = 240
+
+    # Offline stylist summaries (precompute_summaries.py)
+    SUMMARY_MAX_WORDS: int = 35
+    SUMMARY_BATCH_SIZE: int = 20
+    SUMMARY_RATE_PER_MINUTE: int = 30
+
+    # "Complete the look" job (compute_complements.py): MinHash/LSH over
+    # feature sets; BANDS must divide PERMUTATIONS (rows per band = P / B)
+    COMPLEMENTS_TOP_N: int = 6
+    COMPLEMENTS_MINHASH_PERMUTATIONS: int = 64
+    COMPLEMENTS_LSH_BANDS: int = 32
+    COMPLEMENTS_MIN_SCORE: float = 0.1
+    # LSH buckets bigger than this aren't expanded into all pairs: each
+    # member is paired with a sample of this many members from other categories
+    COMPLEMENTS_MAX_BUCKET_SIZE: int = 500
+    COMPLEMENTS_OVERSIZED_BUCKET_PAIRS: int = 32
+
+    # Knowledge graph backend: "auto" (Neo4j if NEO4J_ENABLED, else the
+    # embedded SQLite graph), "neo4j", "embedded" or "off"
+    KG_BACKEND: str = "auto"
+    # relative paths are relative to backend/
+    KG_EMBEDDED_PATH: str = "kg_embedded.sqlite3"
 
     # Neo4j (Knowledge Graph)
     # KG is OFF by default; turn it on later via .env
@@ -29,6 +123,36 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "neo4j+s://df6ecb3e.databases.neo4j.io"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str | None = None
+    # Driver connection pool (size it for the API's worker concurrency)
+    NEO4J_MAX_POOL_SIZE: int = 50
+    NEO4J_ACQUISITION_TIMEOUT_SECONDS: float = 10.0
+    NEO4J_MAX_CONNECTION_LIFETIME_SECONDS: int = 1800
+    NEO4J_LIVENESS_CHECK_SECONDS: float = 60.0
+    # Connections pre-opened on startup (0 = no warm-up)
+    NEO4J_WARMUP_CONNECTIONS: int = 4
+    # Batched UNWIND sync: products per write transaction + retries per batch
+    NEO4J_SYNC_BATCH_SIZE: int = 500
+    NEO4J_SYNC_MAX_RETRIES: int = 3
+    # Orphan Category/Feature nodes deleted per transaction during GC
+    NEO4J_GC_BATCH_SIZE: int = 1000
+    # In-process KG snapshot: lookups are served from memory while the
+    # snapshot is younger than MAX_AGE, otherwise they go to Neo4j
+    KG_SNAPSHOT_ENABLED: bool = True
+    KG_SNAPSHOT_REFRESH_SECONDS: int = 300
+    KG_SNAPSHOT_MAX_AGE_SECONDS: int = 900
+    KG_CONTEXT_CACHE_SIZE: int = 5000
+    KG_CONTEXT_CACHE_TTL_SECONDS: int = 900
+    # DataLoader-style batching of context reads across concurrent searches
+    KG_LOADER_ENABLED: bool = True
+    KG_LOADER_WINDOW_MS: float = 5.0
+    KG_LOADER_MAX_BATCH_SIZE: int = 500
+
+    @field_validator("KG_EMBEDDED_PATH")
+    @classmethod
+    def _resolve_from_backend_dir(cls, value: str) -> str:
+        if value == ":memory:":
+            return value
+        return str(BACKEND_DIR / Path(value).expanduser())
 
     model_config = SettingsConfigDict(
         env_file=".env",
@@ -0,0 +1,109 @@
+# app/core/http_cache.py
+"""
+Conditional-request helpers (ETag / Last-Modified / Cache-Control).
+
+Product data changes only when the scraper runs, so repeat visits of the
+HomePage / detail page can be answered with an empty 304 instead of the
+full JSON. Validators come from `updated_at` (single product) or the
+single-row `catalog_state` version for lists (bumped by a trigger on
+every product write, migration 0006) — one primary-key read instead of
+loading and serialising the whole page.
+
+Timestamps are turned into TIMESTAMPTZ in SQL: the naive `products`
+columns are stored in the DB session's time zone (now()), which is not
+necessarily UTC.
+"""
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Dict, Optional, Tuple
+import hashlib
+
+from fastapi import Request, Response, status
+from sqlalchemy import DateTime, cast, func, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.product import Product
+
+
+def make_etag(*parts: Any) -> str:
+    """Weak ETag: same JSON semantics, byte-identity not promised (gzip etc.)."""
+    digest = hashlib.sha1("|".join(map(str, parts)).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def _as_utc(dt: datetime) -> datetime:
+    # validators come from TIMESTAMPTZ (aware); naive only from SQLite
+    return dt.replace(tzinfo=timezone.utc) if dt.tzinfo is None else dt.astimezone(timezone.utc)
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(_as_utc(dt).replace(microsecond=0), usegmt=True)
+
+
+def cache_headers(
+    etag: str,
+    last_modified: Optional[datetime],
+    max_age: int,
+) -> Dict[str, str]:
+    headers = {
+        "ETag": etag,
+        # browsers may reuse for max_age, then must revalidate (cheap 304)
+        "Cache-Control": f"public, max-age={max_age}, stale-while-revalidate={max_age * 5}",
+    }
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    # weak comparison (RFC 9110): ignore W/ prefixes
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def is_not_modified(
+    request: Request,
+    etag: str,
+    last_modified: Optional[datetime],
+) -> bool:
+    """If-None-Match wins over If-Modified-Since, as the RFC says."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = _as_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+        return _as_utc(last_modified).replace(microsecond=0) <= since
+    return False
+
+
+def not_modified(headers: Dict[str, str]) -> Response:
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def product_changed_at_tz():
+    """Aware last-change time of a product row, interpreted by the DB clock."""
+    return cast(
+        func.coalesce(Product.updated_at, Product.created_at), DateTime(timezone=True)
+    )
+
+
+_CATALOG_STATE_SQL = text("SELECT version, changed_at FROM catalog_state WHERE id = 1")
+
+
+async def catalog_version_async(db: AsyncSession) -> Tuple[str, Optional[datetime]]:
+    """
+    (version string, last change) of the products table, from the
+    single-row counter a trigger bumps on every insert / update / delete.
+    """
+    row = (await db.execute(_CATALOG_STATE_SQL)).one_or_none()
+    if row is None:  # migration 0006 not applied yet
+        return "-", None
+    version, changed_at = row
+    return str(version), changed_at
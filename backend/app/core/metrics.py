@@ -0,0 +1,85 @@
+# app/core/metrics.py
+"""
+Tiny in-process metrics registry.
+
+We don't run Prometheus for this project, so services record counters,
+gauges and timings here and `GET /api/v1/metrics` returns a JSON snapshot.
+Services with their own internal state (LLM providers, DB / Neo4j pools)
+register a *collector* callback instead of pushing values on every call.
+"""
+from typing import Any, Callable, Dict
+import threading
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = {}
+_gauges: Dict[str, float] = {}
+_observations: Dict[str, Dict[str, float]] = {}
+_collectors: Dict[str, Callable[[], Dict[str, Any]]] = {}
+
+
+def inc(name: str, value: float = 1.0) -> None:
+    """Increment a monotonically growing counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0.0) + value
+
+
+def set_gauge(name: str, value: float) -> None:
+    """Set a point-in-time value (queue depth, lag, ...)."""
+    with _lock:
+        _gauges[name] = float(value)
+
+
+def observe(name: str, value: float) -> None:
+    """
+    Record one sample (latency, token count, batch size...).
+    Keeps count / sum / min / max / last — enough for averages without
+    storing every sample.
+    """
+    value = float(value)
+    with _lock:
+        stats = _observations.get(name)
+        if stats is None:
+            _observations[name] = {
+                "count": 1,
+                "sum": value,
+                "min": value,
+                "max": value,
+                "last": value,
+            }
+            return
+        stats["count"] += 1
+        stats["sum"] += value
+        stats["min"] = min(stats["min"], value)
+        stats["max"] = max(stats["max"], value)
+        stats["last"] = value
+
+
+def register_collector(name: str, fn: Callable[[], Dict[str, Any]]) -> None:
+    """
+    Register a callback evaluated lazily on every snapshot.
+    Re-registering the same name replaces the previous callback.
+    """
+    with _lock:
+        _collectors[name] = fn
+
+
+def snapshot() -> Dict[str, Any]:
+    with _lock:
+        observations = {}
+        for name, stats in _observations.items():
+            avg = stats["sum"] / stats["count"] if stats["count"] else 0.0
+            observations[name] = {**stats, "avg": avg}
+        data: Dict[str, Any] = {
+            "counters": dict(_counters),
+            "gauges": dict(_gauges),
+            "observations": observations,
+        }
+        collectors = dict(_collectors)
+
+    # Collectors run outside the lock — they may call inc()/observe() themselves
+    for name, fn in collectors.items():
+        try:
+            data[name] = fn()
+        except Exception as e:
+            data[name] = {"error": f"{type(e).__name__}: {e}"}
+    return data
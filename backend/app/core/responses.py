@@ -0,0 +1,49 @@
+# app/core/responses.py
+"""
+orjson-backed JSON response.
+
+orjson serialises dicts, lists, datetimes, numpy scalars and dataclasses
+(the search hits) natively in C — no jsonable_encoder pass over every
+nested `features` dict. Routers use it as `default_response_class`, and
+endpoints that build their payload by hand return it directly.
+
+orjson is optional: without it this falls back to jsonable_encoder +
+the stdlib encoder (same JSON, just slower).
+"""
+from typing import Any
+import json
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+try:  # optional: fast path
+    import orjson
+except ImportError:
+    orjson = None
+
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY if orjson is not None else 0
+)
+
+
+def _default(obj: Any) -> Any:
+    # pydantic models (a ProductOut inside a hand-built payload) and
+    # anything else orjson doesn't know
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    return jsonable_encoder(obj)
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(
+        jsonable_encoder(content), ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,140 @@
+# app/db/migrations.py
+"""
+Minimal forward-only schema migrations.
+
+`Base.metadata.create_all` only creates missing tables — it never adds
+columns or indexes to an existing `products` table on Neon. Each entry
+below is applied once (tracked in `schema_migrations`) and is written
+with IF NOT EXISTS so re-running against a fresh DB is harmless.
+
+Runs from `create_db.py` and on app startup.
+"""
+from typing import List, Tuple
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+# (migration_id, [SQL statements]) — append only, never edit applied ones
+MIGRATIONS: List[Tuple[str, List[str]]] = [
+    (
+        "0001_product_stylist_summary",
+        [
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS stylist_summary TEXT",
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS summary_hash VARCHAR(64)",
+        ],
+    ),
+    (
+        "0002_product_complements",
+        [
+            "CREATE TABLE IF NOT EXISTS product_complements ("
+            "  product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,"
+            "  rank INTEGER NOT NULL,"
+            "  complement_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,"
+            "  score DOUBLE PRECISION NOT NULL,"
+            "  computed_at TIMESTAMP DEFAULT now(),"
+            "  PRIMARY KEY (product_id, rank)"
+            ")",
+        ],
+    ),
+    (
+        "0003_products_category_id_index",
+        [
+            # keyset pagination: WHERE category = ? AND id > ? ORDER BY id
+            "CREATE INDEX IF NOT EXISTS ix_products_category_id "
+            "ON products (category, id)",
+        ],
+    ),
+    (
+        "0004_products_search_tsv",
+        [
+            # full-text search (services/lexical_search.py); STORED generated
+            # column → always in sync, no triggers
+            "ALTER TABLE products ADD COLUMN IF NOT EXISTS search_tsv tsvector "
+            "GENERATED ALWAYS AS ("
+            "  setweight(to_tsvector('english', coalesce(title, '')), 'A') ||"
+            "  setweight(to_tsvector('english', coalesce(category, '')), 'B') ||"
+            "  setweight(to_tsvector('english', coalesce(features::text, '')), 'C') ||"
+            "  setweight(to_tsvector('english', coalesce(description, '')), 'D')"
+            ") STORED",
+            "CREATE INDEX IF NOT EXISTS ix_products_search_tsv "
+            "ON products USING GIN (search_tsv)",
+        ],
+    ),
+    (
+        "0005_product_outbox",
+        [
+            # write-through indexing events (services/outbox.py)
+            "CREATE TABLE IF NOT EXISTS product_outbox ("
+            "  id SERIAL PRIMARY KEY,"
+            "  product_id INTEGER NOT NULL,"
+            "  op VARCHAR(16) NOT NULL DEFAULT 'upsert',"
+            "  attempts INTEGER NOT NULL DEFAULT 0,"
+            "  last_error TEXT,"
+            "  created_at TIMESTAMP NOT NULL DEFAULT now(),"
+            "  available_at TIMESTAMP NOT NULL DEFAULT now()"
+            ")",
+            "CREATE INDEX IF NOT EXISTS ix_product_outbox_available_at "
+            "ON product_outbox (available_at, id)",
+        ],
+    ),
+    (
+        "0006_catalog_state",
+        [
+            # single-row catalog version for the list ETag / Last-Modified
+            # (core/http_cache.py): one PK read per GET /products instead
+            # of count/max aggregates over the whole table
+            "CREATE TABLE IF NOT EXISTS catalog_state ("
+            "  id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),"
+            "  version BIGINT NOT NULL DEFAULT 0,"
+            "  changed_at TIMESTAMPTZ NOT NULL DEFAULT now()"
+            ")",
+            "INSERT INTO catalog_state (id) VALUES (1) ON CONFLICT (id) DO NOTHING",
+            # bumped by a trigger, in the same transaction as the write, so
+            # the scraper and any other direct writer are covered too.
+            # Only columns the API returns count: summary / hash / updated_at
+            # writes (precompute_summaries.py) leave the version alone
+            "CREATE OR REPLACE FUNCTION bump_catalog_version() RETURNS trigger "
+            "LANGUAGE plpgsql AS $$ BEGIN "
+            "  UPDATE catalog_state SET version = version + 1, changed_at = now() "
+            "  WHERE id = 1; "
+            "  RETURN NULL; "
+            "END $$",
+            "DROP TRIGGER IF EXISTS products_catalog_version ON products",
+            "CREATE TRIGGER products_catalog_version "
+            "AFTER INSERT OR DELETE OR TRUNCATE "
+            "OR UPDATE OF title, price, description, features, image_url, category, product_url "
+            "ON products FOR EACH STATEMENT EXECUTE FUNCTION bump_catalog_version()",
+        ],
+    ),
+]
+
+
+def run_migrations(engine: Engine) -> List[str]:
+    """Apply pending migrations in order. Returns ids applied in this run."""
+    applied_now: List[str] = []
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "CREATE TABLE IF NOT EXISTS schema_migrations ("
+                "  id VARCHAR(128) PRIMARY KEY,"
+                "  applied_at TIMESTAMP DEFAULT now()"
+                ")"
+            )
+        )
+        done = {row[0] for row in conn.execute(text("SELECT id FROM schema_migrations"))}
+
+    for migration_id, statements in MIGRATIONS:
+        if migration_id in done:
+            continue
+        # One transaction per migration so a failure leaves earlier ones applied
+        with engine.begin() as conn:
+            for stmt in statements:
+                conn.execute(text(stmt))
+            conn.execute(
+                text("INSERT INTO schema_migrations (id) VALUES (:id)"),
+                {"id": migration_id},
+            )
+        print(f"🧱 Applied migration {migration_id}")
+        applied_now.append(migration_id)
+
+    return applied_now
@@ -1,6 +1,11 @@
+from typing import Any, AsyncIterator, Dict
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, Session
 
+from app.core import metrics
 from app.core.config import settings
 
 # NeonDB needs SSL
@@ -8,7 +13,11 @@ connect_args = {"sslmode": "require"}
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
     connect_args=connect_args,
 )
 
@@ -21,3 +30,94 @@ def get_db() -> Session:
         yield db
     finally:
         db.close()
+
+
+# ---- async (asyncpg) — used by the async product endpoints ----
+
+_async_engine: AsyncEngine | None = None
+_async_session_factory: async_sessionmaker[AsyncSession] | None = None
+
+
+def async_database_url(url: str) -> str:
+    """
+    Same database, asyncpg driver. libpq-only query params (sslmode,
+    channel_binding) are dropped — asyncpg gets SSL via connect_args.
+    """
+    parsed = make_url(url)
+    parsed = parsed.set(drivername="postgresql+asyncpg")
+    parsed = parsed.difference_update_query(["sslmode", "channel_binding"])
+    return parsed.render_as_string(hide_password=False)
+
+
+def get_async_engine() -> AsyncEngine:
+    """
+    Lazily create the async engine (asyncpg is only needed once an async
+    endpoint is hit).
+
+    DB_POOL_PRE_PING is off by default: with DB_POOL_RECYCLE_SECONDS below
+    Neon's idle timeout a ping per checkout is just an extra round trip.
+    Set DB_STATEMENT_CACHE_SIZE=0 when connecting through Neon's pgbouncer
+    pooler (transaction mode can't keep prepared statements).
+    """
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(settings.DATABASE_URL),
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            connect_args={
+                "ssl": settings.DB_SSL,
+                "statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE,
+            },
+        )
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    global _async_session_factory
+    if _async_session_factory is None:
+        _async_session_factory = async_sessionmaker(
+            get_async_engine(),
+            autoflush=False,
+            expire_on_commit=False,
+        )
+    return _async_session_factory
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
+def _pool_stats(pool: Any) -> Dict[str, Any]:
+    try:
+        return {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+        }
+    except Exception:  # e.g. NullPool / StaticPool in scripts
+        return {"status": pool.status()}
+
+
+def _db_pool_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {"sync": _pool_stats(engine.pool)}
+    if _async_engine is not None:
+        stats["async"] = _pool_stats(_async_engine.pool)
+    return stats
+
+
+metrics.register_collector("db_pool", _db_pool_stats)
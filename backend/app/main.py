@@ -2,13 +2,20 @@
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+
+try:  # optional: brotli (falls back to gzip for clients without br)
+    from brotli_asgi import BrotliMiddleware
+except ImportError:
+    BrotliMiddleware = None
 
 from app.core.config import settings
 from app.api.v1 import health, products, search, scrape
-from app.db.session import SessionLocal
-from app.services.embeddings import index_all_products
-from app.services.graph import sync_products_to_graph
-from app.models.product import Product
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.services.catalog_sync import sync_catalog
+from app.services.graph import start_kg_snapshot_refresher, warm_up_neo4j_pool
+from app.services.outbox import start_outbox_worker, stop_outbox_worker
 
 
 
@@ -36,8 +43,16 @@ def create_app() -> FastAPI:
         allow_credentials=True,
         allow_methods=["*"],
         allow_headers=["*"],
+        # let the frontend read cache validators on cross-origin responses
+        expose_headers=["ETag", "Last-Modified"],
     )
 
+    # ---------- compression (large product lists) ----------
+    if BrotliMiddleware is not None:
+        app.add_middleware(BrotliMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+    else:
+        app.add_middleware(GZipMiddleware, minimum_size=settings.COMPRESSION_MIN_SIZE)
+
     # ---------- v1 routes ----------
     prefix = settings.API_V1_PREFIX  # "/api/v1"
     app.include_router(health.router, prefix=prefix)
@@ -58,18 +73,29 @@ def create_app() -> FastAPI:
     @app.on_event("startup")
     def startup_index_qdrant_and_kg():
         print("🪄 Starting up — syncing embeddings & knowledge graph...")
-        db = SessionLocal()
         try:
-            # 1) Qdrant embeddings (runs only if already empty)
-            emb_chunks = index_all_products(db, skip_if_indexed=True)
+            run_migrations(engine)
+        except Exception as e:
+            print("❌ Error while applying DB migrations:", e)
+
+        try:
+            # 0) pre-open Neo4j connections (TLS handshakes off the hot path)
+            warm_up_neo4j_pool()
+        except Exception as e:
+            print("⚠️ Neo4j pool warm-up failed:", e)
 
-            # 2) Neo4j KG (only if NEO4J_ENABLED=True)
-            products = db.query(Product).all()
-            kg_nodes = sync_products_to_graph(products, skip_if_exists=True)
+        db = SessionLocal()
+        try:
+            # 1+2) One streamed pass over products, each batch fanned out
+            #      concurrently to Qdrant (only if the collection is empty)
+            #      and the KG (incremental: changed since last watermark,
+            #      then deletions)
+            stats = sync_catalog(db, skip_qdrant_if_indexed=True)
 
             print(
-                f"✨ Embedding products indexed (new): {emb_chunks}, "
-                f"KG products synced (new): {kg_nodes}"
+                f"✨ Embedding products indexed (new): {stats['embedded']}, "
+                f"KG products synced (changed): {stats['kg_upserted']}, "
+                f"KG products removed: {stats['kg_deleted']}"
             )
         except Exception as e:
             # important: startup failure should NOT crash app on Render
@@ -77,6 +103,16 @@ def create_app() -> FastAPI:
         finally:
             db.close()
 
+        # 3) In-memory KG snapshot for search-time lookups (background refresh)
+        start_kg_snapshot_refresher()
+
+        # 4) Write-through indexing of product create/update (product_outbox)
+        start_outbox_worker()
+
+    @app.on_event("shutdown")
+    def shutdown_outbox_worker():
+        stop_outbox_worker()
+
     return app
 
 
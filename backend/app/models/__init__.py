@@ -1,5 +1,7 @@
 # app/models/__init__.py
 
 from .product import Product
+from .product_complement import ProductComplement
+from .product_outbox import ProductOutbox
 
-__all__ = ["Product"]
+__all__ = ["Product", "ProductComplement", "ProductOutbox"]
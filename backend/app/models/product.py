@@ -7,6 +7,7 @@ from sqlalchemy import (
     Text,
     JSON,
     DateTime,
+    Index,
     func,
 )
 
@@ -15,6 +16,10 @@ from app.db.base import Base  # adjust if your Base is defined elsewhere
 
 class Product(Base):
     __tablename__ = "products"
+    __table_args__ = (
+        # keyset pagination within a category (migration 0003)
+        Index("ix_products_category_id", "category", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -27,6 +32,11 @@ class Product(Base):
     category = Column(String, nullable=True)
     product_url = Column(String, nullable=True)
 
+    # Precomputed short stylist summary used in RAG prompts instead of the
+    # full description; summary_hash = content hash it was generated from
+    stylist_summary = Column(Text, nullable=True)
+    summary_hash = Column(String(64), nullable=True)
+
     # Optional timestamps (if present / useful)
     created_at = Column(DateTime, server_default=func.now())
     updated_at = Column(DateTime, onupdate=func.now())
@@ -0,0 +1,30 @@
+# app/models/product_complement.py
+from sqlalchemy import (
+    Column,
+    Integer,
+    Float,
+    DateTime,
+    ForeignKey,
+    func,
+)
+
+from app.db.base import Base
+
+
+class ProductComplement(Base):
+    """
+    Precomputed "complete the look" suggestions (compute_complements.py).
+    One row per (product, rank); the primary key doubles as the index the
+    detail page reads from.
+    """
+    __tablename__ = "product_complements"
+
+    product_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    rank = Column(Integer, primary_key=True)
+    complement_id = Column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), nullable=False
+    )
+    score = Column(Float, nullable=False)
+    computed_at = Column(DateTime, server_default=func.now())
@@ -0,0 +1,40 @@
+# app/models/product_outbox.py
+from sqlalchemy import (
+    Column,
+    Integer,
+    String,
+    Text,
+    DateTime,
+    Index,
+    func,
+)
+
+from app.db.base import Base
+
+
+class ProductOutbox(Base):
+    """
+    "Product changed, re-index it" events, written in the same transaction
+    as the product insert / update (services/products.py) and drained by
+    the background worker in services/outbox.py (Qdrant + KG).
+
+    Rows only carry the product id — the worker always indexes the
+    product's *current* state, so duplicates and re-deliveries are harmless.
+    Processed rows are deleted; rows that used up OUTBOX_MAX_ATTEMPTS stay
+    (with last_error) for inspection.
+    """
+    __tablename__ = "product_outbox"
+    __table_args__ = (
+        # worker claim query: pending rows, oldest first (migration 0005)
+        Index("ix_product_outbox_available_at", "available_at", "id"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    # no FK: the event must survive the product being deleted
+    product_id = Column(Integer, nullable=False)
+    op = Column(String(16), nullable=False, default="upsert")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    # retry backoff: not picked up before this time
+    available_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -94,3 +94,41 @@ class ProductOut(ProductBase):
     class Config:
         # Pydantic v2 style – ORM model se attributes read karega
         from_attributes = True
+
+
+class ProductPage(BaseModel):
+    # cursor mode of GET /products: pass next_cursor back as ?cursor=...
+    items: List[ProductOut]
+    next_cursor: Optional[str] = None
+
+
+class ProductCard(BaseModel):
+    # compact list view (HomePage grid): GET /products?view=card
+    id: int
+    title: str
+    price: Optional[float] = None
+    image_url: Optional[str] = None
+    category: Optional[str] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ProductCardPage(BaseModel):
+    items: List[ProductCard]
+    next_cursor: Optional[str] = None
+
+
+class ProductBatchRequest(BaseModel):
+    ids: List[int] = Field(..., min_length=1)
+
+
+class ProductBatch(BaseModel):
+    # same order as requested (duplicates collapsed); unknown ids listed separately
+    items: List[ProductOut]
+    missing_ids: List[int] = []
+
+
+class ComplementOut(ProductOut):
+    # feature-overlap score from the offline "complete the look" job
+    score: float
@@ -0,0 +1,22 @@
+# app/schemas/search.py
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(slots=True)
+class SearchHit:
+    """
+    One product candidate inside /search (vector / lexical hit, fused
+    score). A slotted dataclass instead of a dict per hit: smaller, typo-
+    safe attribute access, and orjson serialises it natively — no Pydantic
+    validation for an internal, per-request structure.
+    """
+    id: int
+    title: str = ""
+    category: str = ""
+    price: Optional[float] = None
+    description: str = ""
+    summary: str = ""
+    image_url: str = ""
+    product_url: str = ""
+    score: float = 0.0
@@ -0,0 +1,152 @@
+# app/services/catalog_sync.py
+"""
+Startup sync of Qdrant + KG in ONE streamed pass over `products`.
+
+Before, startup read the catalog once for embeddings and again for the
+KG. Here the rows are streamed in batches of CATALOG_SYNC_BATCH_SIZE
+(server-side cursor via yield_per, so memory stays flat) and each batch
+is handed to both sinks, which run concurrently in two threads:
+
+- vector indexer: embed + upsert the batch into Qdrant (only when the
+  collection is empty, same rule as index_all_products)
+- graph syncer: upsert the products changed since the KG watermark
+
+While the sinks work on batch N the main thread already fetches batch
+N+1 — at most two batches are in memory. The KG's bookkeeping (deleting
+products gone from Postgres, orphan GC, watermark) runs once at the end,
+using the ids collected during the pass.
+
+When Qdrant is already indexed (the usual restart) only the KG needs
+rows, so we stream just the changed products plus a light id-only query
+instead of scanning every full row.
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Set
+import time
+
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.product import Product
+from app.services.embeddings import qdrant_point_count, upsert_products_to_qdrant
+from app.services.graph import (
+    changed_since,
+    finish_incremental_kg_sync,
+    kg_backend,
+    kg_sync_watermark,
+    product_changed_at,
+    upsert_products_to_graph,
+)
+
+
+class _Sink:
+    """One consumer of the batch stream; stops (keeps the error) on first failure."""
+
+    def __init__(self, name: str, write: Callable[[List[Product]], int]):
+        self.name = name
+        self.write = write
+        self.written = 0
+        self.error: Optional[BaseException] = None
+        self.future: Optional[Future] = None
+
+    def submit(self, pool: ThreadPoolExecutor, batch: List[Product]) -> None:
+        if self.error is None and batch:
+            self.future = pool.submit(self.write, batch)
+
+    def wait(self) -> None:
+        if self.future is None:
+            return
+        try:
+            self.written += self.future.result()
+        except Exception as e:
+            self.error = e
+            print(f"❌ Startup {self.name} sync failed, skipping the rest of the pass:", e)
+        self.future = None
+
+
+def sync_catalog(db: Session, skip_qdrant_if_indexed: bool = True) -> Dict[str, int]:
+    """
+    Returns {scanned, embedded, kg_upserted, kg_deleted, orphans_removed}.
+    A failing sink doesn't stop the other one; a failed KG pass leaves the
+    watermark untouched so the next run retries those products.
+    """
+    stats = {
+        "scanned": 0,
+        "embedded": 0,
+        "kg_upserted": 0,
+        "kg_deleted": 0,
+        "orphans_removed": 0,
+    }
+
+    index_vectors = True
+    if skip_qdrant_if_indexed:
+        points = qdrant_point_count()
+        if points > 0:
+            index_vectors = False
+            print(
+                f"ℹ️ Qdrant collection '{settings.QDRANT_COLLECTION}' "
+                f"already has {points} points — skipping re-index on startup."
+            )
+
+    sync_kg = kg_backend() is not None
+    watermark: datetime | None = kg_sync_watermark() if sync_kg else None
+    if not sync_kg:
+        print("ℹ️ KG disabled (KG_BACKEND / NEO4J_ENABLED) — skipping KG sync.")
+    if not (index_vectors or sync_kg):
+        return stats
+
+    stmt = select(Product).order_by(Product.id)
+    pg_ids: Set[int] = set()
+    if sync_kg and not index_vectors:
+        # KG only: changed rows + all ids (for deletions) are enough
+        if watermark is not None:
+            changed_at = func.coalesce(Product.updated_at, Product.created_at)
+            stmt = stmt.where(changed_at >= watermark)
+        pg_ids = {pid for (pid,) in db.execute(select(Product.id))}
+    collect_ids = sync_kg and index_vectors
+
+    vectors = _Sink("Qdrant", upsert_products_to_qdrant)
+    graph = _Sink("KG", upsert_products_to_graph)
+    newest_synced: datetime | None = None
+    batch_size = max(1, settings.CATALOG_SYNC_BATCH_SIZE)
+
+    start = time.perf_counter()
+    result = db.execute(stmt.execution_options(yield_per=batch_size)).scalars()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="catalog-sync") as pool:
+        for partition in result.partitions():
+            batch = list(partition)
+            stats["scanned"] += len(batch)
+            if collect_ids:
+                pg_ids.update(p.id for p in batch)
+            kg_batch = [p for p in batch if changed_since(p, watermark)] if sync_kg else []
+            for p in kg_batch:
+                changed_at = product_changed_at(p)
+                if changed_at is not None and (newest_synced is None or changed_at > newest_synced):
+                    newest_synced = changed_at
+
+            # previous batch must be done before this one goes out
+            vectors.wait()
+            graph.wait()
+            if index_vectors:
+                vectors.submit(pool, batch)
+            graph.submit(pool, kg_batch)
+        vectors.wait()
+        graph.wait()
+
+    stats["embedded"] = vectors.written
+    stats["kg_upserted"] = graph.written
+    if sync_kg and graph.error is None:
+        kg_stats = finish_incremental_kg_sync(pg_ids, newest_synced, graph.written)
+        stats["kg_deleted"] = kg_stats["deleted"]
+        stats["orphans_removed"] = kg_stats["orphans_removed"]
+
+    elapsed = time.perf_counter() - start
+    metrics.observe("startup.catalog_sync_seconds", elapsed)
+    print(
+        f"🔁 Catalog sync: scanned {stats['scanned']} products in {elapsed:.2f}s "
+        f"(embedded={stats['embedded']}, kg_upserted={stats['kg_upserted']})"
+    )
+    return stats
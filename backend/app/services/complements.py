@@ -0,0 +1,254 @@
+# app/services/complements.py
+"""
+"Complete the look": cross-category suggestions from feature overlap.
+
+Offline job (compute_complements.py):
+1. every product → set of canonical feature phrases (same normalisation
+   as the KG, see graph_text.explode_features)
+2. MinHash signatures for all products at once (NumPy)
+3. LSH banding → candidate pairs that share at least one band bucket,
+   instead of comparing every product with every other one. Oversized
+   buckets (a popular feature combination shared by hundreds of
+   products) are sampled instead of expanded into every pair
+4. keep pairs from *different* categories, score them by exact Jaccard,
+   store the top-N per product in `product_complements`
+
+The detail page then reads its suggestions with one indexed join.
+"""
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence, Set, Tuple
+import hashlib
+
+import numpy as np
+from sqlalchemy.orm import Session, load_only
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.product import Product
+from app.models.product_complement import ProductComplement
+from app.services.graph_text import explode_features
+
+# Universal hashing h(x) = (a·x + b) mod p over 32-bit token hashes;
+# a < 2^31 keeps a·x inside uint64.
+_PRIME = np.uint64(4294967311)
+_SEED = 42
+
+
+def _feature_set(product: Product) -> Set[str]:
+    return {phrase for _, phrase in explode_features(product.features)}
+
+
+def _category_key(product: Product) -> str:
+    return (product.category or "").strip().lower()
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(token.encode("utf-8"), digest_size=4).digest(), "little"
+    )
+
+
+def minhash_signatures(feature_sets: List[Set[str]], num_perm: int) -> np.ndarray:
+    """(n_products, num_perm) uint64 MinHash matrix; empty sets → all max."""
+    rng = np.random.default_rng(_SEED)
+    a = rng.integers(1, 2**31, size=num_perm, dtype=np.uint64)
+    b = rng.integers(0, 2**31, size=num_perm, dtype=np.uint64)
+
+    sigs = np.full((len(feature_sets), num_perm), np.iinfo(np.uint64).max, dtype=np.uint64)
+    for i, tokens in enumerate(feature_sets):
+        if not tokens:
+            continue
+        hashes = np.array([_token_hash(t) for t in tokens], dtype=np.uint64)
+        permuted = (np.outer(hashes, a) + b) % _PRIME
+        sigs[i] = permuted.min(axis=0)
+    return sigs
+
+
+def _sample_bucket_pairs(
+    members: List[int],
+    groups: Optional[Sequence[str]],
+    per_member: int,
+    rng: np.random.Generator,
+) -> Set[Tuple[int, int]]:
+    """
+    Pairs for an oversized bucket: every member gets up to `per_member`
+    random partners from the bucket — from *other* groups (categories)
+    when groups are given, since same-category pairs are dropped later
+    anyway. O(bucket · per_member) instead of O(bucket²).
+    """
+    pairs: Set[Tuple[int, int]] = set()
+    by_group: Dict[str, List[int]] = defaultdict(list)
+    for m in members:
+        by_group[groups[m] if groups is not None else ""].append(m)
+
+    for group, own in by_group.items():
+        if groups is None:
+            others = np.array(members)
+        else:
+            others = np.array([m for m in members if groups[m] != group])
+        if len(others) == 0:
+            continue
+        k = min(per_member, len(others))
+        # with replacement: O(k) per member (choice without replacement
+        # permutes all of `others`); duplicates just collapse in the set
+        picks = others[rng.integers(0, len(others), size=(len(own), k))]
+        for m, partners in zip(own, picks.tolist()):
+            for o in partners:
+                if o != m:
+                    pairs.add((m, o) if m < o else (o, m))
+    return pairs
+
+
+def lsh_candidate_pairs(
+    sigs: np.ndarray,
+    bands: int,
+    max_bucket_size: int,
+    groups: Optional[Sequence[str]] = None,
+    oversized_pairs_per_member: Optional[int] = None,
+) -> Set[Tuple[int, int]]:
+    """
+    Row-index pairs (i < j) that collide in at least one LSH band.
+    Buckets above max_bucket_size are sampled (see _sample_bucket_pairs);
+    `groups` = category key per row.
+    """
+    if oversized_pairs_per_member is None:
+        oversized_pairs_per_member = settings.COMPLEMENTS_OVERSIZED_BUCKET_PAIRS
+    n, num_perm = sigs.shape
+    rows = num_perm // bands
+    rng = np.random.default_rng(_SEED)
+    pairs: Set[Tuple[int, int]] = set()
+    oversized = 0
+    oversized_members: Set[int] = set()
+    sampled: Set[Tuple[int, ...]] = set()
+    for band in range(bands):
+        buckets: Dict[bytes, List[int]] = defaultdict(list)
+        chunk = sigs[:, band * rows:(band + 1) * rows]
+        for i in range(n):
+            buckets[chunk[i].tobytes()].append(i)
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            if len(members) > max_bucket_size:
+                # identical feature sets share a bucket in *every* band —
+                # sample each distinct bucket once, not once per band
+                key = tuple(members)
+                if key in sampled:
+                    continue
+                sampled.add(key)
+                oversized += 1
+                oversized_members.update(members)
+                pairs |= _sample_bucket_pairs(
+                    members, groups, oversized_pairs_per_member, rng
+                )
+                continue
+            for x in range(len(members)):
+                for y in range(x + 1, len(members)):
+                    pairs.add((members[x], members[y]))
+
+    metrics.inc("complements.oversized_buckets", oversized)
+    metrics.set_gauge("complements.oversized_bucket_products", len(oversized_members))
+    if oversized:
+        print(
+            f"⚠️ {oversized} oversized LSH buckets ({len(oversized_members)} products) "
+            f"sampled at {oversized_pairs_per_member} pairs per member"
+        )
+    return pairs
+
+
+def compute_complements(
+    products: List[Product],
+    top_n: Optional[int] = None,
+) -> Dict[int, List[Tuple[int, float]]]:
+    """
+    {product_id: [(complement_id, score), ...]} best first, only products
+    from other categories, score = Jaccard similarity of feature sets.
+    """
+    top_n = top_n or settings.COMPLEMENTS_TOP_N
+    num_perm = settings.COMPLEMENTS_MINHASH_PERMUTATIONS
+    bands = settings.COMPLEMENTS_LSH_BANDS
+    if bands <= 0 or num_perm % bands:
+        raise ValueError(
+            "COMPLEMENTS_LSH_BANDS must divide COMPLEMENTS_MINHASH_PERMUTATIONS"
+        )
+
+    # products without features can't be matched on overlap
+    items = [(p, _feature_set(p)) for p in products]
+    items = [(p, feats) for p, feats in items if feats]
+    if not items:
+        return {}
+
+    sigs = minhash_signatures([feats for _, feats in items], num_perm)
+    pairs = lsh_candidate_pairs(
+        sigs,
+        bands,
+        settings.COMPLEMENTS_MAX_BUCKET_SIZE,
+        groups=[_category_key(p) for p, _ in items],
+    )
+
+    scored: Dict[int, List[Tuple[int, float]]] = defaultdict(list)
+    for i, j in pairs:
+        p, p_feats = items[i]
+        q, q_feats = items[j]
+        if _category_key(p) == _category_key(q):
+            continue  # "complete the look" = other categories only
+        score = len(p_feats & q_feats) / len(p_feats | q_feats)
+        if score < settings.COMPLEMENTS_MIN_SCORE:
+            continue
+        scored[p.id].append((q.id, score))
+        scored[q.id].append((p.id, score))
+
+    metrics.observe("complements.candidate_pairs", len(pairs))
+    return {
+        pid: sorted(cands, key=lambda c: (-c[1], c[0]))[:top_n]
+        for pid, cands in scored.items()
+    }
+
+
+def rebuild_product_complements(db: Session, top_n: Optional[int] = None) -> Dict[str, int]:
+    """
+    Recompute the whole `product_complements` table (replace in one
+    transaction, so readers never see a half-written table).
+    """
+    # only what the matching needs — not descriptions, summaries etc.
+    products: List[Product] = (
+        db.query(Product)
+        .options(load_only(Product.id, Product.category, Product.features))
+        .all()
+    )
+    complements = compute_complements(products, top_n=top_n)
+
+    db.query(ProductComplement).delete(synchronize_session=False)
+    db.bulk_insert_mappings(
+        ProductComplement,
+        [
+            {"product_id": pid, "rank": rank, "complement_id": cid, "score": score}
+            for pid, cands in complements.items()
+            for rank, (cid, score) in enumerate(cands, start=1)
+        ],
+    )
+    db.commit()
+
+    stats = {
+        "products": len(products),
+        "with_complements": len(complements),
+        "rows": sum(len(c) for c in complements.values()),
+    }
+    print(f"👗 Complete-the-look rebuilt: {stats}")
+    return stats
+
+
+def get_complete_the_look(
+    db: Session,
+    product_id: int,
+    limit: int = 6,
+) -> List[Tuple[Product, float]]:
+    """Precomputed suggestions for one product: a single PK-indexed join."""
+    rows = (
+        db.query(Product, ProductComplement.score)
+        .join(ProductComplement, ProductComplement.complement_id == Product.id)
+        .filter(ProductComplement.product_id == product_id)
+        .order_by(ProductComplement.rank)
+        .limit(limit)
+        .all()
+    )
+    return [(product, score) for product, score in rows]
@@ -1,5 +1,5 @@
 # app/services/embeddings.py
-from typing import List, Optional
+from typing import Dict, List, Optional
 
 from qdrant_client import QdrantClient
 from qdrant_client.http import models as qmodels
@@ -89,6 +89,12 @@ def _product_to_text(product: Product) -> str:
     return "\n".join([p for p in parts if p])
 
 
+def qdrant_point_count() -> int:
+    ensure_collection()
+    info = get_qdrant().get_collection(settings.QDRANT_COLLECTION)
+    return int(info.points_count or 0)
+
+
 def index_all_products(db: Session, skip_if_indexed: bool = False) -> int:
     """
     Fetch all products from Neon Postgres and upsert into Qdrant.
@@ -97,59 +103,91 @@ def index_all_products(db: Session, skip_if_indexed: bool = False) -> int:
     If skip_if_indexed=True and collection already has points,
     we don't re-index.
     """
-    ensure_collection()
-    client = get_qdrant()
-    embedder = get_embedder()
-
     if skip_if_indexed:
-        info = client.get_collection(settings.QDRANT_COLLECTION)
-        if info.points_count and info.points_count > 0:
+        points = qdrant_point_count()
+        if points > 0:
             print(
                 f"ℹ️ Qdrant collection '{settings.QDRANT_COLLECTION}' "
-                f"already has {info.points_count} points — skipping re-index on startup."
+                f"already has {points} points — skipping re-index on startup."
             )
             return 0
 
     products: List[Product] = db.query(Product).all()
+    return upsert_products_to_qdrant(products)
+
+
+def _product_payload(product: Product) -> dict:
+    return {
+        "product_id": product.id,
+        "title": product.title,
+        "category": product.category,
+        "description": product.description,
+        "stylist_summary": product.stylist_summary,
+        "price": float(product.price) if product.price is not None else None,
+        "image_url": product.image_url,
+        "product_url": product.product_url,
+    }
+
+
+def upsert_products_to_qdrant(products: List[Product]) -> int:
+    """
+    Embed `products` with ONE encode call and upsert them into Qdrant
+    (point id = product id, so re-upserting a product just overwrites it).
+    Returns number of upserted points.
+    """
     if not products:
         return 0
 
-    ids: List[int] = []
-    vectors: List[List[float]] = []
-    payloads: List[dict] = []
+    ensure_collection()
+    client = get_qdrant()
+    embedder = get_embedder()
 
     texts = [_product_to_text(p) for p in products]
     embeddings = embedder.encode(texts, normalize_embeddings=True)
 
-    for product, vector in zip(products, embeddings):
-        ids.append(product.id)
-        vectors.append(vector.tolist())
-
-        payloads.append(
-            {
-                "product_id": product.id,
-                "title": product.title,
-                "category": product.category,
-                "description": product.description,
-                "price": float(product.price) if product.price is not None else None,
-                "image_url": product.image_url,
-                "product_url": product.product_url,
-            }
-        )
-
     # 👉 Upsert with NAMED vector
     client.upsert(
         collection_name=settings.QDRANT_COLLECTION,
         points=qmodels.Batch(
-            ids=ids,
-            vectors={QDRANT_VECTOR_NAME: vectors},
-            payloads=payloads,
+            ids=[p.id for p in products],
+            vectors={QDRANT_VECTOR_NAME: [vector.tolist() for vector in embeddings]},
+            payloads=[_product_payload(p) for p in products],
         ),
     )
 
     return len(products)
 
 
+def get_product_vectors(product_ids: List[int]) -> Dict[int, List[float]]:
+    """Stored embeddings for these products (one retrieve call); missing ids are absent."""
+    if not product_ids:
+        return {}
+    points = get_qdrant().retrieve(
+        collection_name=settings.QDRANT_COLLECTION,
+        ids=list(product_ids),
+        with_payload=False,
+        with_vectors=[QDRANT_VECTOR_NAME],
+    )
+    vectors: Dict[int, List[float]] = {}
+    for point in points:
+        vector = point.vector
+        if isinstance(vector, dict):
+            vector = vector.get(QDRANT_VECTOR_NAME)
+        if vector is not None:
+            vectors[int(point.id)] = vector
+    return vectors
+
+
+def delete_products_from_qdrant(product_ids: List[int]) -> int:
+    if not product_ids:
+        return 0
+    get_qdrant().delete(
+        collection_name=settings.QDRANT_COLLECTION,
+        points_selector=qmodels.PointIdsList(points=list(product_ids)),
+    )
+    return len(product_ids)
+
+
 def semantic_search(
     query: str,
     limit: int = 5,
@@ -0,0 +1,198 @@
+# app/services/export.py
+"""
+Streaming catalog export (NDJSON / CSV / Parquet) for analytics.
+
+Rows are read through a server-side cursor (yield_per) in batches of
+EXPORT_BATCH_SIZE and every batch is encoded and yielded right away, so
+memory stays flat whether the catalog has a thousand rows or millions.
+Optionally each row gets its embedding from Qdrant (one retrieve call
+per batch).
+
+The generators open their OWN session: a StreamingResponse keeps
+iterating after the endpoint has returned, when a request-scoped
+`get_db` session may already be closed.
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+import csv
+import io
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.responses import dumps
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.services.embeddings import get_product_vectors
+
+try:  # optional: only needed for format=parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
+EXPORT_COLUMNS = (
+    "id",
+    "title",
+    "price",
+    "category",
+    "description",
+    "features",
+    "image_url",
+    "product_url",
+    "stylist_summary",
+    "created_at",
+    "updated_at",
+)
+
+EXPORT_FORMATS = {
+    # format: (media type, file extension)
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+
+def parquet_available() -> bool:
+    return pa is not None
+
+
+def _row_batches(
+    category: Optional[str],
+    include_vectors: bool,
+    batch_size: int,
+) -> Iterator[List[Dict[str, Any]]]:
+    stmt = select(*(getattr(Product, c) for c in EXPORT_COLUMNS)).order_by(Product.id)
+    if category:
+        stmt = stmt.where(Product.category == category)
+
+    db = SessionLocal()
+    try:
+        result = db.execute(stmt.execution_options(yield_per=batch_size)).mappings()
+        for partition in result.partitions():
+            rows = [dict(row) for row in partition]
+            if include_vectors:
+                vectors = get_product_vectors([row["id"] for row in rows])
+                for row in rows:
+                    row["vector"] = vectors.get(row["id"])
+            yield rows
+    finally:
+        db.close()
+
+
+def _ndjson(batches: Iterator[List[Dict[str, Any]]]) -> Iterator[bytes]:
+    for rows in batches:
+        yield b"".join(dumps(row) + b"\n" for row in rows)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):  # features / vector as a JSON cell
+        return dumps(value).decode("utf-8")
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _csv(
+    batches: Iterator[List[Dict[str, Any]]],
+    columns: List[str],
+) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for rows in batches:
+        writer.writerows([_csv_value(row[c]) for c in columns] for row in rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():  # header only (empty export)
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file for ParquetWriter; bytes are drained after each row group."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._pos = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _parquet_schema(include_vectors: bool):
+    fields = [
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("price", pa.float64()),
+        ("category", pa.string()),
+        ("description", pa.string()),
+        # free-form JSON (dict / list / string depending on the scrape)
+        ("features", pa.string()),
+        ("image_url", pa.string()),
+        ("product_url", pa.string()),
+        ("stylist_summary", pa.string()),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ]
+    if include_vectors:
+        fields.append(("vector", pa.list_(pa.float32())))
+    return pa.schema(fields)
+
+
+def _parquet(
+    batches: Iterator[List[Dict[str, Any]]],
+    include_vectors: bool,
+) -> Iterator[bytes]:
+    """One row group per batch; the footer goes out with the last chunk."""
+    schema = _parquet_schema(include_vectors)
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="zstd")
+    try:
+        for rows in batches:
+            for row in rows:
+                if row["features"] is not None:
+                    row["features"] = dumps(row["features"]).decode("utf-8")
+            writer.write_table(pa.Table.from_pylist(rows, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_products(
+    fmt: str,
+    category: Optional[str] = None,
+    include_vectors: bool = False,
+    batch_size: Optional[int] = None,
+) -> Iterator[bytes]:
+    """Byte chunks of the whole (optionally category-filtered) catalog in `fmt`."""
+    batches = _row_batches(
+        category, include_vectors, max(1, batch_size or settings.EXPORT_BATCH_SIZE)
+    )
+    if fmt == "ndjson":
+        return _ndjson(batches)
+    if fmt == "csv":
+        columns = list(EXPORT_COLUMNS) + (["vector"] if include_vectors else [])
+        return _csv(batches, columns)
+    if fmt == "parquet":
+        if pa is None:
+            raise RuntimeError("Parquet export needs pyarrow installed")
+        return _parquet(batches, include_vectors)
+    raise ValueError(f"Unknown export format {fmt!r} (expected one of {list(EXPORT_FORMATS)})")
@@ -1,13 +1,53 @@
 # app/services/graph.py
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Set
+from datetime import datetime
+import re
+import threading
+import time
 
 from neo4j import GraphDatabase, Driver
+from neo4j.exceptions import DriverError, Neo4jError
+from sqlalchemy import func
+from sqlalchemy.orm import Session
 
+from app.core import metrics
+from app.core.cache import LRUCache
 from app.core.config import settings
 from app.models.product import Product
+from app.services import graph_embedded
+from app.services.graph_loader import BatchLoader
+from app.services.graph_snapshot import GraphSnapshot
+from app.services.graph_text import (
+    format_kg_context,
+    normalize_tokens,
+    product_graph_row,
+)
 
 _driver: Driver | None = None
 
+KG_BACKENDS = ("auto", "neo4j", "embedded", "off")
+
+
+def kg_backend() -> str | None:
+    """
+    Active KG backend from settings.KG_BACKEND: "neo4j", "embedded" or
+    None (KG stages disabled). "auto" = Neo4j when NEO4J_ENABLED, else the
+    embedded SQLite graph (graph_embedded.py), so local/test setups keep
+    the same hybrid behaviour.
+    """
+    backend = (settings.KG_BACKEND or "auto").strip().lower()
+    if backend not in KG_BACKENDS:
+        raise ValueError(
+            f"Unknown KG_BACKEND {settings.KG_BACKEND!r} (expected one of {KG_BACKENDS})"
+        )
+    if backend == "auto":
+        return "neo4j" if settings.NEO4J_ENABLED else "embedded"
+    if backend == "neo4j":
+        return "neo4j" if settings.NEO4J_ENABLED else None
+    if backend == "embedded":
+        return "embedded"
+    return None
+
 
 def get_neo4j_driver() -> Driver:
     """
@@ -21,10 +61,110 @@ def get_neo4j_driver() -> Driver:
         _driver = GraphDatabase.driver(
             settings.NEO4J_URI,
             auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+            max_connection_pool_size=settings.NEO4J_MAX_POOL_SIZE,
+            connection_acquisition_timeout=settings.NEO4J_ACQUISITION_TIMEOUT_SECONDS,
+            # below Aura's idle-connection cut-off, so we recycle before it drops us
+            max_connection_lifetime=settings.NEO4J_MAX_CONNECTION_LIFETIME_SECONDS,
+            # ping connections idle longer than this before handing them out
+            liveness_check_timeout=settings.NEO4J_LIVENESS_CHECK_SECONDS,
         )
+        _instrument_pool(_driver)
     return _driver
 
 
+def _instrument_pool(driver: Driver) -> None:
+    """
+    Time every connection acquisition (= wait for a free pool slot, plus
+    connect/TLS for new connections). The driver has no public hook for
+    this, so we wrap its internal pool; if the internals change we just
+    lose the metric.
+    """
+    pool = getattr(driver, "_pool", None)
+    acquire = getattr(pool, "acquire", None)
+    if acquire is None:
+        return
+
+    def timed_acquire(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return acquire(*args, **kwargs)
+        except Exception:
+            metrics.inc("kg.pool_acquire_failures")
+            raise
+        finally:
+            metrics.observe("kg.pool_acquire_wait_seconds", time.perf_counter() - start)
+
+    pool.acquire = timed_acquire
+
+
+def _pool_stats() -> Dict[str, Any]:
+    stats: Dict[str, Any] = {
+        "max_size": settings.NEO4J_MAX_POOL_SIZE,
+        "in_use": 0,
+        "idle": 0,
+    }
+    pool = getattr(_driver, "_pool", None)
+    connections = getattr(pool, "connections", None)
+    if connections is None:
+        return {**stats, "connected": False}
+    try:
+        with pool.lock:
+            per_address = {addr: list(conns) for addr, conns in connections.items()}
+    except Exception:
+        return {**stats, "connected": False}
+    for conns in per_address.values():
+        in_use = sum(1 for c in conns if getattr(c, "in_use", False))
+        stats["in_use"] += in_use
+        stats["idle"] += len(conns) - in_use
+    return {**stats, "connected": True, "addresses": len(per_address)}
+
+
+metrics.register_collector("neo4j_pool", _pool_stats)
+
+
+def warm_up_neo4j_pool(connections: int | None = None) -> int:
+    """
+    Pre-open pool connections at startup so the first searches after a
+    deploy don't pay TCP + TLS handshakes to Aura. Opens `connections`
+    sessions concurrently (each holds its connection until all have run
+    a trivial query, forcing distinct connections). Returns connections
+    opened.
+    """
+    n = settings.NEO4J_WARMUP_CONNECTIONS if connections is None else connections
+    n = min(max(0, n), settings.NEO4J_MAX_POOL_SIZE)
+    if n == 0 or kg_backend() != "neo4j":
+        return 0
+
+    driver = get_neo4j_driver()
+    start = time.perf_counter()
+    driver.verify_connectivity()
+
+    barrier = threading.Barrier(n)
+
+    def _open_one() -> None:
+        with driver.session() as session:
+            session.run("RETURN 1").consume()
+            try:
+                barrier.wait(timeout=settings.NEO4J_ACQUISITION_TIMEOUT_SECONDS)
+            except threading.BrokenBarrierError:
+                pass
+
+    threads = [
+        threading.Thread(target=_open_one, name=f"neo4j-warmup-{i}", daemon=True)
+        for i in range(n)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    elapsed = time.perf_counter() - start
+    opened = _pool_stats()["idle"]
+    print(f"🔥 Neo4j pool warmed up: {opened} connections in {elapsed:.2f}s")
+    metrics.observe("kg.pool_warmup_seconds", elapsed)
+    return opened
+
+
 def close_neo4j_driver() -> None:
     global _driver
     if _driver is not None:
@@ -57,6 +197,20 @@ def ensure_schema() -> None:
                 "CREATE INDEX feature_name_index IF NOT EXISTS "
                 "FOR (f:Feature) ON (f.name)"
             )
+            # Candidate lookup indexes (see get_candidate_product_ids_from_kg)
+            session.run(
+                "CREATE INDEX product_price_index IF NOT EXISTS "
+                "FOR (p:Product) ON (p.price)"
+            )
+            session.run(
+                "CREATE INDEX term_value_index IF NOT EXISTS "
+                "FOR (t:Term) ON (t.value)"
+            )
+            session.run(
+                "CREATE FULLTEXT INDEX category_name_fts IF NOT EXISTS "
+                "FOR (c:Category) ON EACH [c.name] "
+                "OPTIONS {indexConfig: {`fulltext.analyzer`: 'english'}}"
+            )
     except Exception as e:
         # Index creation failure should never break app startup
         print("⚠️ Skipping Neo4j index creation due to error:", e)
@@ -65,46 +219,123 @@ def ensure_schema() -> None:
 # ---- core write helpers ----
 
 
-def _upsert_product_tx(
-    tx,
-    product_id: int,
-    title: str | None,
-    category: str | None,
-    price: float | None,
-    features: List[str],
-):
-    tx.run(
-        """
-        MERGE (p:Product {product_id: $product_id})
-        SET p.title = $title,
-            p.category = $category,
-            p.price = $price
-        """,
-        product_id=product_id,
-        title=title,
-        category=category,
-        price=price,
+# One round trip per batch: the whole chunk is sent as a parameter list and
+# expanded server-side with UNWIND (FOREACH handles the optional category
+# and the per-product feature lists without multiplying rows).
+# Feature nodes are atomic, canonical phrases shared across products; the
+# relationship type carries the group (product / fabric / function).
+_UPSERT_PRODUCTS_CYPHER = """
+UNWIND $rows AS row
+MERGE (p:Product {product_id: row.product_id})
+SET p.title = row.title,
+    p.category = row.category,
+    p.price = row.price,
+    p.kg_context = row.kg_context
+WITH p, row
+// drop old edges so changed categories / features don't linger
+OPTIONAL MATCH (p)-[old:BELONGS_TO|HAS_FEATURE|HAS_FABRIC|HAS_FUNCTION|HAS_TERM]->()
+DELETE old
+WITH DISTINCT p, row
+FOREACH (cat IN CASE WHEN row.category IS NULL THEN [] ELSE [row.category] END |
+    MERGE (c:Category {name: cat})
+    MERGE (p)-[:BELONGS_TO]->(c)
+)
+FOREACH (feat IN row.features.product |
+    MERGE (f:Feature {name: feat})
+    MERGE (p)-[:HAS_FEATURE]->(f)
+)
+FOREACH (feat IN row.features.fabric |
+    MERGE (f:Feature {name: feat})
+    MERGE (p)-[:HAS_FABRIC]->(f)
+)
+FOREACH (feat IN row.features.function |
+    MERGE (f:Feature {name: feat})
+    MERGE (p)-[:HAS_FUNCTION]->(f)
+)
+FOREACH (term IN row.terms |
+    MERGE (t:Term {value: term})
+    MERGE (p)-[:HAS_TERM]->(t)
+)
+"""
+
+
+def _upsert_products_batch_tx(tx, rows: List[Dict[str, Any]]) -> None:
+    tx.run(_UPSERT_PRODUCTS_CYPHER, rows=rows).consume()
+
+
+def _write_batch_with_retry(session, rows: List[Dict[str, Any]]) -> None:
+    """
+    execute_write already retries transient errors inside one transaction;
+    this adds a few outer attempts (with backoff) so a dropped Aura
+    connection only costs us this batch, not the whole sync.
+    """
+    attempts = max(1, settings.NEO4J_SYNC_MAX_RETRIES)
+    for attempt in range(1, attempts + 1):
+        try:
+            session.execute_write(_upsert_products_batch_tx, rows)
+            return
+        except (Neo4jError, DriverError) as e:
+            if attempt == attempts:
+                raise
+            delay = 0.5 * (2 ** (attempt - 1))
+            print(
+                f"⚠️ KG batch write failed (attempt {attempt}/{attempts}): {e} "
+                f"— retrying in {delay:.1f}s"
+            )
+            time.sleep(delay)
+
+
+def upsert_products_to_graph(products: List[Product]) -> int:
+    """
+    MERGE products (+ categories, features) into Neo4j in batches of
+    NEO4J_SYNC_BATCH_SIZE using a single UNWIND query per batch.
+    Returns the number of products written.
+    """
+    if not products:
+        return 0
+
+    backend = kg_backend()
+    if backend == "embedded":
+        return graph_embedded.upsert_products(products)
+    if backend is None:
+        return 0
+
+    rows = [product_graph_row(p) for p in products]
+    batch_size = max(1, settings.NEO4J_SYNC_BATCH_SIZE)
+    driver = get_neo4j_driver()
+
+    start = time.perf_counter()
+    with driver.session() as session:
+        for i in range(0, len(rows), batch_size):
+            _write_batch_with_retry(session, rows[i:i + batch_size])
+        _set_catalog_version(session.execute_write(_bump_catalog_version_tx))
+
+    elapsed = time.perf_counter() - start
+    rate = len(rows) / elapsed if elapsed > 0 else float(len(rows))
+    print(
+        f"🕸️ KG sync: {len(rows)} products in {elapsed:.2f}s "
+        f"({rate:.0f} products/sec, batch size {batch_size})"
     )
+    metrics.observe("kg.sync_products_per_sec", rate)
+    return len(rows)
 
-    if category:
-        tx.run(
-            """
-            MERGE (c:Category {name: $category})
-            MERGE (p:Product {product_id: $product_id})-[:BELONGS_TO]->(c)
-            """,
-            product_id=product_id,
-            category=category,
-        )
 
-    for feat in features:
-        tx.run(
-            """
-            MERGE (f:Feature {name: $name})
-            MERGE (p:Product {product_id: $product_id})-[:HAS_FEATURE]->(f)
-            """,
-            name=feat,
-            product_id=product_id,
-        )
+def delete_products_from_graph(product_ids: List[int]) -> int:
+    """DETACH DELETE these products (orphan nodes are left to the GC)."""
+    if not product_ids:
+        return 0
+
+    backend = kg_backend()
+    if backend == "embedded":
+        return graph_embedded.delete_products(product_ids)
+    if backend is None:
+        return 0
+
+    driver = get_neo4j_driver()
+    with driver.session() as session:
+        session.execute_write(_delete_products_tx, list(product_ids))
+        _set_catalog_version(session.execute_write(_bump_catalog_version_tx))
+    return len(product_ids)
 
 
 def _count_products_tx(tx) -> int:
@@ -156,13 +387,19 @@ def sync_products_to_graph(
     - Otherwise:
         → only upsert products (MERGE) without deleting existing graph.
     """
-    if not settings.NEO4J_ENABLED:
-        print("ℹ️ Neo4j disabled (NEO4J_ENABLED=False) — skipping KG sync.")
+    backend = kg_backend()
+    if backend is None:
+        print("ℹ️ KG disabled (KG_BACKEND / NEO4J_ENABLED) — skipping KG sync.")
         return 0
 
     if not products:
         return 0
 
+    if backend == "embedded":
+        if skip_if_exists and graph_embedded.count_products() > 0:
+            return 0
+        return graph_embedded.upsert_products(products)
+
     driver = get_neo4j_driver()
     ensure_schema()
 
@@ -180,32 +417,396 @@ def sync_products_to_graph(
             )
             return 0
 
-        # Agar skip_if_exists=False diya hai, to soft upsert karega
-        # (NO delete, NO full rebuild) — sirf MERGE.
-        upserted = 0
-        for p in products:
-            if isinstance(p.features, dict):
-                feats = [f"{k}: {v}" for k, v in p.features.items()]
-            elif isinstance(p.features, list):
-                feats = [str(x) for x in p.features]
-            elif isinstance(p.features, str):
-                feats = [f.strip() for f in p.features.split(",") if f.strip()]
-            else:
-                feats = []
-
-            price_val = float(p.price) if p.price is not None else None
-
-            session.execute_write(
-                _upsert_product_tx,
-                p.id,
-                p.title,
-                p.category,
-                price_val,
-                feats,
-            )
-            upserted += 1
+    # Agar skip_if_exists=False diya hai, to soft upsert karega
+    # (NO delete, NO full rebuild) — sirf MERGE, batched via UNWIND.
+    return upsert_products_to_graph(products)
+
+
+# ---- incremental sync (watermark + deletions + orphan GC) ----
 
-    return upserted
+_SYNC_STATE_KEY = "products"
+
+# Bump whenever the node/edge layout written by product_graph_row changes:
+# a graph synced with an older layout ignores its watermark and gets a
+# one-off full re-sync.
+GRAPH_SCHEMA_VERSION = 5
+
+
+def _read_watermark_tx(tx) -> str | None:
+    record = tx.run(
+        """
+        MATCH (s:SyncState {key: $key})
+        RETURN s.watermark AS wm, s.schema_version AS version
+        """,
+        key=_SYNC_STATE_KEY,
+    ).single()
+    if not record or record["version"] != GRAPH_SCHEMA_VERSION:
+        return None
+    return record["wm"]
+
+
+def _write_watermark_tx(tx, watermark: str) -> None:
+    tx.run(
+        """
+        MERGE (s:SyncState {key: $key})
+        SET s.watermark = $wm,
+            s.schema_version = $version,
+            s.synced_at = datetime()
+        """,
+        key=_SYNC_STATE_KEY,
+        wm=watermark,
+        version=GRAPH_SCHEMA_VERSION,
+    )
+
+
+def _bump_catalog_version_tx(tx) -> int:
+    record = tx.run(
+        """
+        MERGE (s:SyncState {key: $key})
+        SET s.catalog_version = coalesce(s.catalog_version, 0) + 1
+        RETURN s.catalog_version AS version
+        """,
+        key=_SYNC_STATE_KEY,
+    ).single()
+    return int(record["version"])
+
+
+def _read_catalog_version_tx(tx) -> int:
+    record = tx.run(
+        "MATCH (s:SyncState {key: $key}) RETURN s.catalog_version AS version",
+        key=_SYNC_STATE_KEY,
+    ).single()
+    return int(record["version"] or 0) if record else 0
+
+
+def _graph_product_ids_tx(tx) -> List[int]:
+    result = tx.run("MATCH (p:Product) RETURN p.product_id AS id")
+    return [rec["id"] for rec in result if rec["id"] is not None]
+
+
+def _delete_products_tx(tx, ids: List[int]) -> None:
+    tx.run(
+        """
+        UNWIND $ids AS id
+        MATCH (p:Product {product_id: id})
+        DETACH DELETE p
+        """,
+        ids=ids,
+    ).consume()
+
+
+def _delete_orphans_tx(tx, label: str, limit: int) -> int:
+    # label comes from our own constant list, never from user input
+    record = tx.run(
+        f"""
+        MATCH (n:{label})
+        WHERE NOT (n)--()
+        WITH n LIMIT $limit
+        DELETE n
+        RETURN count(*) AS deleted
+        """,
+        limit=limit,
+    ).single()
+    return int(record["deleted"]) if record else 0
+
+
+def gc_orphan_nodes(session) -> int:
+    """Delete Category / Feature / Term nodes with no relationships, in batches."""
+    batch = max(1, settings.NEO4J_GC_BATCH_SIZE)
+    total = 0
+    for label in ("Category", "Feature", "Term"):
+        while True:
+            deleted = session.execute_write(_delete_orphans_tx, label, batch)
+            total += deleted
+            if deleted < batch:
+                break
+    return total
+
+
+def product_changed_at(product: Product) -> datetime | None:
+    return product.updated_at or product.created_at
+
+
+def changed_since(product: Product, watermark: datetime | None) -> bool:
+    """Python twin of `coalesce(updated_at, created_at) >= watermark`."""
+    if watermark is None:
+        return True
+    changed_at = product_changed_at(product)
+    return changed_at is not None and changed_at >= watermark
+
+
+def kg_sync_watermark() -> datetime | None:
+    """
+    Step 1 of an incremental sync: products changed at/after this need
+    upserting (None = first run / schema change → all of them). Only
+    call with the KG enabled.
+    """
+    if kg_backend() == "embedded":
+        watermark = graph_embedded.read_watermark()
+    else:
+        ensure_schema()
+        with get_neo4j_driver().session() as session:
+            watermark = session.execute_read(_read_watermark_tx)
+    return datetime.fromisoformat(watermark) if watermark else None
+
+
+def finish_incremental_kg_sync(
+    pg_ids: Set[int],
+    newest_synced: datetime | None,
+    upserted: int,
+) -> Dict[str, int]:
+    """
+    Last step, after the changed products were upserted:
+
+    - delete graph products whose ids are not in `pg_ids` (all ids in Postgres)
+    - garbage-collect orphan Category / Feature / Term nodes
+    - advance the watermark to `newest_synced`
+    """
+    stats = {"upserted": upserted, "deleted": 0, "orphans_removed": 0}
+    if kg_backend() == "embedded":
+        stats["deleted"] = graph_embedded.finish_sync(pg_ids, newest_synced)
+        print(
+            f"🗂️ Embedded KG sync: upserted={stats['upserted']}, "
+            f"deleted={stats['deleted']}"
+        )
+        return stats
+
+    with get_neo4j_driver().session() as session:
+        # 2) remove products deleted from Postgres
+        graph_ids = set(session.execute_read(_graph_product_ids_tx))
+        stale = sorted(graph_ids - pg_ids)
+        batch = max(1, settings.NEO4J_SYNC_BATCH_SIZE)
+        for i in range(0, len(stale), batch):
+            session.execute_write(_delete_products_tx, stale[i:i + batch])
+        stats["deleted"] = len(stale)
+        if stale:
+            _set_catalog_version(session.execute_write(_bump_catalog_version_tx))
+
+        # 3) orphan categories / features (from deletes or changed features)
+        stats["orphans_removed"] = gc_orphan_nodes(session)
+
+        # 4) advance watermark
+        if newest_synced is not None:
+            session.execute_write(_write_watermark_tx, newest_synced.isoformat())
+
+    if (stats["upserted"] or stats["deleted"]) and _snapshot is not None:
+        try:
+            refresh_kg_snapshot()
+        except Exception as e:
+            print("⚠️ KG snapshot refresh after sync failed:", e)
+
+    print(
+        f"🕸️ Incremental KG sync: upserted={stats['upserted']}, "
+        f"deleted={stats['deleted']}, orphans_removed={stats['orphans_removed']}"
+    )
+    return stats
+
+
+def incremental_sync_products_to_graph(db: Session) -> Dict[str, int]:
+    """
+    Bring the KG up to date with Postgres without a full rebuild:
+
+    1. MERGE only products changed since the last run
+       (coalesce(updated_at, created_at) >= watermark stored on a
+       (:SyncState {key: "products"}) node; first run or a
+       GRAPH_SCHEMA_VERSION change = everything)
+    2. DETACH DELETE Product nodes whose ids no longer exist in Postgres
+    3. Garbage-collect orphan Category / Feature / Term nodes in batches
+    4. Advance the watermark to the newest timestamp we synced
+
+    `>=` re-syncs rows sitting exactly on the watermark — MERGE is
+    idempotent, so that's cheaper than risking a missed update.
+
+    Startup uses services/catalog_sync.py instead, which runs the same
+    steps inside its single pass over the products table.
+    """
+    if kg_backend() is None:
+        print("ℹ️ KG disabled (KG_BACKEND / NEO4J_ENABLED) — skipping KG sync.")
+        return {"upserted": 0, "deleted": 0, "orphans_removed": 0}
+
+    watermark = kg_sync_watermark()
+    query = db.query(Product)
+    if watermark:
+        changed_at = func.coalesce(Product.updated_at, Product.created_at)
+        query = query.filter(changed_at >= watermark)
+    changed: List[Product] = query.all()
+
+    # 1) upsert changed products (batched UNWIND)
+    upserted = upsert_products_to_graph(changed)
+
+    pg_ids = {pid for (pid,) in db.query(Product.id)}
+    timestamps = [t for t in map(product_changed_at, changed) if t is not None]
+    return finish_incremental_kg_sync(
+        pg_ids, max(timestamps) if timestamps else None, upserted
+    )
+
+
+# ---- in-process snapshot (answers lookups without Neo4j round trips) ----
+
+_snapshot: GraphSnapshot | None = None
+_snapshot_thread: threading.Thread | None = None
+
+
+def _load_snapshot_rows_tx(tx) -> List[Dict[str, Any]]:
+    result = tx.run(
+        """
+        MATCH (p:Product)
+        OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
+        WITH p, collect(DISTINCT c.name) AS categories
+        OPTIONAL MATCH (p)-[:HAS_FEATURE|HAS_FABRIC|HAS_FUNCTION]->(f:Feature)
+        WITH p, categories, collect(DISTINCT f.name) AS features
+        OPTIONAL MATCH (p)-[:HAS_TERM]->(t:Term)
+        RETURN p.product_id AS id,
+               p.title AS title,
+               p.category AS category,
+               p.price AS price,
+               p.kg_context AS context,
+               categories,
+               features,
+               collect(DISTINCT t.value) AS terms
+        """
+    )
+    return [record.data() for record in result]
+
+
+def refresh_kg_snapshot() -> int:
+    """Rebuild the in-memory KG snapshot. Returns number of products in it."""
+    global _snapshot
+    if not (kg_backend() == "neo4j" and settings.KG_SNAPSHOT_ENABLED):
+        return 0
+    start = time.perf_counter()
+    driver = get_neo4j_driver()
+    with driver.session() as session:
+        rows = session.execute_read(_load_snapshot_rows_tx)
+        # piggyback: picks up syncs done by other instances
+        _set_catalog_version(session.execute_read(_read_catalog_version_tx))
+    _snapshot = GraphSnapshot(rows)
+    metrics.observe("kg.snapshot_build_seconds", time.perf_counter() - start)
+    return len(_snapshot)
+
+
+def get_fresh_snapshot() -> GraphSnapshot | None:
+    """The snapshot if it exists and is younger than KG_SNAPSHOT_MAX_AGE_SECONDS."""
+    snap = _snapshot
+    if snap is None or not settings.KG_SNAPSHOT_ENABLED:
+        return None
+    if snap.age_seconds > settings.KG_SNAPSHOT_MAX_AGE_SECONDS:
+        return None
+    return snap
+
+
+def _snapshot_refresh_loop() -> None:
+    while True:
+        try:
+            size = refresh_kg_snapshot()
+            print(f"🧠 KG snapshot refreshed ({size} products)")
+        except Exception as e:
+            # Keep the old snapshot; it expires on its own and lookups
+            # fall back to Neo4j
+            print("⚠️ KG snapshot refresh failed:", e)
+        time.sleep(max(5, settings.KG_SNAPSHOT_REFRESH_SECONDS))
+
+
+def start_kg_snapshot_refresher() -> None:
+    """Start the background refresh thread (idempotent)."""
+    global _snapshot_thread
+    if not (kg_backend() == "neo4j" and settings.KG_SNAPSHOT_ENABLED):
+        return
+    if _snapshot_thread is not None and _snapshot_thread.is_alive():
+        return
+    _snapshot_thread = threading.Thread(
+        target=_snapshot_refresh_loop, name="kg-snapshot", daemon=True
+    )
+    _snapshot_thread.start()
+
+
+def _snapshot_stats() -> Dict[str, Any]:
+    snap = _snapshot
+    if snap is None:
+        return {"loaded": False}
+    return {
+        "loaded": True,
+        "products": len(snap),
+        "age_seconds": round(snap.age_seconds, 1),
+        "fresh": get_fresh_snapshot() is not None,
+    }
+
+
+metrics.register_collector("kg_snapshot", _snapshot_stats)
+
+
+# Each constraint is one index-backed lookup; results are intersected on
+# product ids in Python. No query here starts from a Product label scan.
+_CANDIDATE_QUERIES: Dict[str, str] = {
+    # full-text (english analyzer) index on Category.name
+    "category": """
+        CALL db.index.fulltext.queryNodes('category_name_fts', $q) YIELD node
+        MATCH (p:Product)-[:BELONGS_TO]->(node)
+        RETURN DISTINCT p.product_id AS id
+    """,
+    # range index seek on Term.value, then expand to products
+    "tags": """
+        MATCH (t:Term)
+        WHERE t.value IN $terms
+        MATCH (p:Product)-[:HAS_TERM]->(t)
+        RETURN DISTINCT p.product_id AS id
+    """,
+    # price applied to an already narrowed id set (product_id index seek)
+    "price_filter": """
+        MATCH (p:Product)
+        WHERE p.product_id IN $ids
+          AND (p.price IS NULL OR p.price <= $max_price)
+        RETURN p.product_id AS id
+    """,
+    # price as the only constraint: range index seek on Product.price
+    "price_only": """
+        MATCH (p:Product)
+        WHERE p.price <= $max_price
+        RETURN p.product_id AS id
+    """,
+}
+
+_LUCENE_SPECIAL_RE = re.compile(r'([+\-!(){}\[\]^"~*?:\\/]|&&|\|\|)')
+
+
+def _candidate_plan(
+    category_hint: str | None,
+    max_price: float | None,
+    tags: List[str],
+) -> List[tuple[str, Dict[str, Any]]]:
+    """Which lookups to run (in order) with their parameters."""
+    plan: List[tuple[str, Dict[str, Any]]] = []
+    if category_hint:
+        query = _LUCENE_SPECIAL_RE.sub(r"\\\1", category_hint.lower())
+        plan.append(("category", {"q": query}))
+    terms = normalize_tokens(" ".join(tags))
+    if terms:
+        plan.append(("tags", {"terms": terms}))
+    if max_price is not None:
+        plan.append(("price_only", {"max_price": max_price}))
+    return plan
+
+
+def _candidate_ids_tx(
+    tx,
+    category_hint: str | None,
+    max_price: float | None,
+    tags: List[str],
+) -> List[int]:
+    ids: set[int] | None = None
+    for name, params in _candidate_plan(category_hint, max_price, tags):
+        if name == "price_only" and ids is not None:
+            # Narrowed already → filter those ids instead of a price range scan
+            name, params = "price_filter", {"ids": sorted(ids), "max_price": max_price}
+        found = {
+            rec["id"]
+            for rec in tx.run(_CANDIDATE_QUERIES[name], **params)
+            if rec["id"] is not None
+        }
+        ids = found if ids is None else ids & found
+        if not ids:
+            return []
+    return sorted(ids or [])
 
 
 def get_candidate_product_ids_from_kg(
@@ -215,56 +816,204 @@ def get_candidate_product_ids_from_kg(
 ) -> List[int]:
     """
     Use Neo4j as a conceptual filter:
-    - category_hint: e.g. "hoodie", "tshirt"
-    - max_price: e.g. 2000
+    - category_hint: e.g. "hoodie", "tshirt"  → full-text index on Category.name
+    - max_price: e.g. 2000                     → range index on Product.price
     - tags: style / intent words like ["oversized", "winter", "casual"]
+                                               → Term.value index (normalised
+                                                 title/feature/description
+                                                 tokens, any match)
+
+    Constraints are ANDed by intersecting the product ids of each lookup.
+    Products without a price pass the price filter (as before) unless price
+    is the only constraint.
 
     Returns a list of product_ids that match these constraints.
-    If Neo4J is disabled or no matches, returns [].
+    If the KG is disabled or no matches, returns [].
     """
-    if not settings.NEO4J_ENABLED:
+    backend = kg_backend()
+    if backend is None:
         return []
 
-    driver = get_neo4j_driver()
-    tags = [t.lower() for t in tags if t]
+    if not (category_hint or max_price is not None or tags):
+        return []
+
+    if backend == "embedded":
+        return graph_embedded.candidate_ids(category_hint, max_price, [t for t in tags if t])
 
+    snap = get_fresh_snapshot()
+    if snap is not None:
+        metrics.inc("kg.snapshot_hits")
+        return snap.candidate_ids(category_hint, max_price, [t for t in tags if t])
+    metrics.inc("kg.snapshot_misses")
+
+    driver = get_neo4j_driver()
     with driver.session() as session:
-        result = session.run(
-            """
-            MATCH (p:Product)
-            OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
-            OPTIONAL MATCH (p)-[:HAS_FEATURE]->(f:Feature)
-            WITH p, c, f
-            WHERE
-              (
-                $category IS NULL
-                OR toLower(p.category) CONTAINS $category
-                OR (c IS NOT NULL AND toLower(c.name) CONTAINS $category)
-              )
-              AND
-              (
-                $max_price IS NULL
-                OR p.price IS NULL
-                OR p.price <= $max_price
-              )
-              AND
-              (
-                size($tags) = 0 OR
-                any(t IN $tags WHERE
-                    (f IS NOT NULL AND toLower(f.name) CONTAINS t) OR
-                    toLower(p.title) CONTAINS t OR
-                    toLower(coalesce(p.description, "")) CONTAINS t
-                )
-              )
-            RETURN DISTINCT p.product_id AS id
-            """,
-            category=(category_hint.lower() if category_hint else None),
-            max_price=max_price,
-            tags=tags,
+        return session.execute_read(
+            _candidate_ids_tx, category_hint, max_price, [t for t in tags if t]
         )
 
-        ids: List[int] = [rec["id"] for rec in result if rec.get("id") is not None]
-        return ids
+
+def _plan_operators(plan: Dict[str, Any]) -> List[str]:
+    ops = [plan.get("operatorType", "").split("@")[0]]
+    for child in plan.get("children", []):
+        ops.extend(_plan_operators(child))
+    return ops
+
+
+def profile_candidate_lookup(
+    category_hint: str | None = "hoodie",
+    max_price: float | None = 2000,
+    tags: List[str] | None = None,
+) -> Dict[str, List[str]]:
+    """
+    Run every candidate lookup under PROFILE and return the operator types
+    of each plan. Raises RuntimeError if any plan contains a full label
+    scan (NodeByLabelScan / AllNodesScan), i.e. an index is missing or
+    not used — handy after schema changes or Neo4j upgrades.
+    """
+    tags = tags if tags is not None else ["oversized"]
+    driver = get_neo4j_driver()
+    ensure_schema()
+
+    plans: Dict[str, List[str]] = {}
+    with driver.session() as session:
+        for name, params in _candidate_plan(category_hint, max_price, tags):
+            summary = session.run("PROFILE " + _CANDIDATE_QUERIES[name], **params).consume()
+            plans[name] = _plan_operators(summary.profile or {})
+        # the narrowed price path is used whenever another constraint exists
+        summary = session.run(
+            "PROFILE " + _CANDIDATE_QUERIES["price_filter"],
+            ids=[1, 2, 3],
+            max_price=max_price or 0,
+        ).consume()
+        plans["price_filter"] = _plan_operators(summary.profile or {})
+
+    scans = {
+        name: [op for op in ops if op in ("NodeByLabelScan", "AllNodesScan")]
+        for name, ops in plans.items()
+    }
+    offenders = {name: ops for name, ops in scans.items() if ops}
+    if offenders:
+        raise RuntimeError(f"Candidate lookups use full scans: {offenders}")
+    return plans
+
+
+# ---- per-product RAG context cache ----
+
+# Bumped on every sync that writes or deletes products (stored on the
+# SyncState node, re-read on each snapshot refresh), so cached entries of
+# an older catalog are simply never hit again and age out of the LRU.
+_catalog_version = 0
+_context_cache = LRUCache(
+    maxsize=settings.KG_CONTEXT_CACHE_SIZE,
+    ttl_seconds=settings.KG_CONTEXT_CACHE_TTL_SECONDS or None,
+)
+
+
+def _set_catalog_version(version: int) -> None:
+    global _catalog_version
+    _catalog_version = version
+
+
+def _context_cache_stats() -> Dict[str, Any]:
+    return {"catalog_version": _catalog_version, **_context_cache.stats()}
+
+
+metrics.register_collector("kg_context_cache", _context_cache_stats)
+
+
+def _fetch_kg_context_tx(tx, ids: List[int]) -> Dict[int, str]:
+    # kg_context is precomputed at sync time → no relationship expansion
+    result = tx.run(
+        """
+        MATCH (p:Product)
+        WHERE p.product_id IN $ids
+        RETURN p.product_id AS id, p.kg_context AS context
+        """,
+        ids=ids,
+    )
+    return {
+        record["id"]: record["context"] or ""
+        for record in result
+        if record["id"] is not None
+    }
+
+
+def _fetch_kg_context_batch(ids: List[int]) -> Dict[int, str]:
+    driver = get_neo4j_driver()
+    with driver.session() as session:
+        return session.execute_read(_fetch_kg_context_tx, ids)
+
+
+# Cache misses from concurrent searches are coalesced into one
+# `WHERE p.product_id IN $ids` query per short window
+_context_loader: BatchLoader[int, str] = BatchLoader(
+    _fetch_kg_context_batch,
+    window_seconds=settings.KG_LOADER_WINDOW_MS / 1000.0,
+    max_batch_size=settings.KG_LOADER_MAX_BATCH_SIZE,
+    name="kg.context_loader",
+)
+
+
+def get_kg_context_by_product(product_ids: List[int]) -> Dict[int, str]:
+    """
+    For given product_ids, return {product_id: compact KG context text}
+    (extra categories + features) to merge into the RAG record of each
+    product.
+
+    Lookup order: per-product LRU (keyed by product id + catalog version)
+    → fresh snapshot → one Neo4j query for the ids still missing (batched
+    with concurrent callers, see graph_loader.py). With a warm cache the
+    RAG step doesn't touch Neo4j at all.
+
+    The embedded backend is a local primary-key lookup → no cache needed.
+
+    Returns {} when the KG is disabled or product_ids empty.
+    """
+    backend = kg_backend()
+    if backend is None:
+        return {}
+
+    if not product_ids:
+        return {}
+
+    if backend == "embedded":
+        return graph_embedded.context_by_product(product_ids)
+
+    version = _catalog_version
+    contexts: Dict[int, str] = {}
+    missing: List[int] = []
+    unique_ids = list(dict.fromkeys(product_ids))
+    for pid in unique_ids:
+        text = _context_cache.get((pid, version))
+        if text is None:
+            missing.append(pid)
+        elif text:
+            contexts[pid] = text
+
+    metrics.inc("kg.context_cache_hits", len(unique_ids) - len(missing))
+    if not missing:
+        return contexts
+    metrics.inc("kg.context_cache_misses", len(missing))
+
+    snap = get_fresh_snapshot()
+    if snap is not None:
+        metrics.inc("kg.snapshot_hits")
+        fetched = snap.context_by_product(missing)
+    else:
+        metrics.inc("kg.snapshot_misses")
+        if settings.KG_LOADER_ENABLED:
+            fetched = _context_loader.load_many(missing)
+        else:
+            fetched = _fetch_kg_context_batch(missing)
+
+    for pid in missing:
+        # "" is cached too, so products without KG facts aren't re-fetched
+        text = fetched.get(pid, "")
+        _context_cache.set((pid, version), text)
+        if text:
+            contexts[pid] = text
+    return contexts
 
 
 def get_kg_context_for_products(product_ids: List[int]) -> List[str]:
@@ -272,14 +1021,22 @@ def get_kg_context_for_products(product_ids: List[int]) -> List[str]:
     For given product_ids, return human-readable KG context strings
     (categories + features) that we can feed into the LLM with RAG.
 
-    Returns [] when NEO4J_ENABLED=False or product_ids empty.
+    Returns [] when the KG is disabled or product_ids empty.
     """
-    if not settings.NEO4J_ENABLED:
+    backend = kg_backend()
+    if backend is None:
         return []
 
     if not product_ids:
         return []
 
+    if backend == "embedded":
+        return graph_embedded.context_strings(product_ids)
+
+    snap = get_fresh_snapshot()
+    if snap is not None:
+        return snap.context_strings(product_ids)
+
     driver = get_neo4j_driver()
     with driver.session() as session:
         result = session.run(
@@ -287,7 +1044,7 @@ def get_kg_context_for_products(product_ids: List[int]) -> List[str]:
             MATCH (p:Product)
             WHERE p.product_id IN $ids
             OPTIONAL MATCH (p)-[:BELONGS_TO]->(c:Category)
-            OPTIONAL MATCH (p)-[:HAS_FEATURE]->(f:Feature)
+            OPTIONAL MATCH (p)-[:HAS_FEATURE|HAS_FABRIC|HAS_FUNCTION]->(f:Feature)
             RETURN p.product_id AS id,
                    p.title AS title,
                    collect(DISTINCT c.name) AS categories,
@@ -0,0 +1,318 @@
+# app/services/graph_embedded.py
+"""
+Embedded KG backend (stdlib sqlite3, one file on disk).
+
+Used when Neo4j isn't available (KG_BACKEND=embedded, or "auto" with
+NEO4J_ENABLED=False) so local / test environments keep the same hybrid
+search behaviour. Same operations and semantics as the Neo4j service in
+graph.py — upsert, incremental sync, candidate lookup, context lookup —
+stored as plain index tables instead of nodes and edges:
+
+- kg_products        product_id → title / category / price / kg_context
+- kg_category_terms  normalised category token → product_id
+- kg_terms           normalised title / feature / description token → product_id
+- kg_features        canonical feature phrase + relationship → product_id
+"""
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Set, Tuple
+import sqlite3
+import threading
+
+from app.core.config import settings
+from app.models.product import Product
+from app.services.graph_text import (
+    FEATURE_REL_TYPES,
+    normalize_tokens,
+    product_graph_row,
+)
+
+_SYNC_STATE_KEY = "products"
+
+# Bump whenever the tables / row layout change → one full re-sync
+EMBEDDED_SCHEMA_VERSION = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kg_products (
+    product_id INTEGER PRIMARY KEY,
+    title TEXT,
+    category TEXT,
+    price REAL,
+    kg_context TEXT
+);
+CREATE INDEX IF NOT EXISTS kg_products_price ON kg_products (price);
+
+CREATE TABLE IF NOT EXISTS kg_category_terms (
+    token TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (token, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kg_category_terms_product ON kg_category_terms (product_id);
+
+CREATE TABLE IF NOT EXISTS kg_terms (
+    token TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (token, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kg_terms_product ON kg_terms (product_id);
+
+CREATE TABLE IF NOT EXISTS kg_features (
+    name TEXT NOT NULL,
+    rel TEXT NOT NULL,
+    product_id INTEGER NOT NULL,
+    PRIMARY KEY (name, rel, product_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS kg_features_product ON kg_features (product_id);
+
+CREATE TABLE IF NOT EXISTS kg_sync_state (
+    key TEXT PRIMARY KEY,
+    watermark TEXT,
+    schema_version INTEGER,
+    synced_at TEXT
+);
+"""
+
+# One connection shared by all threads; every query is sub-millisecond,
+# so a lock is simpler (and safe for ":memory:") than a pool.
+_conn: sqlite3.Connection | None = None
+_lock = threading.Lock()
+
+
+def _get_conn() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        conn = sqlite3.connect(settings.KG_EMBEDDED_PATH, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        _conn = conn
+    return _conn
+
+
+def close_embedded_graph() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def _placeholders(values: List[Any]) -> str:
+    return ",".join("?" * len(values))
+
+
+def _chunks(values: List[Any], size: int = 500) -> Iterable[List[Any]]:
+    # stay well below SQLite's bound-parameter limit
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def _ids_for_tokens(conn: sqlite3.Connection, table: str, tokens: List[str]) -> set[int]:
+    # table comes from our own constants, never from user input
+    return {
+        pid
+        for (pid,) in conn.execute(
+            f"SELECT product_id FROM {table} WHERE token IN ({_placeholders(tokens)})",
+            tokens,
+        )
+    }
+
+
+def _delete_product_rows(conn: sqlite3.Connection, ids: List[int]) -> None:
+    for chunk in _chunks(ids):
+        marks = _placeholders(chunk)
+        for table in ("kg_products", "kg_category_terms", "kg_terms", "kg_features"):
+            conn.execute(f"DELETE FROM {table} WHERE product_id IN ({marks})", chunk)
+
+
+# ---- writes ----
+
+
+def upsert_products(products: List[Product]) -> int:
+    """Replace the KG rows of these products. Returns products written."""
+    if not products:
+        return 0
+    rows = [product_graph_row(p) for p in products]
+    with _lock:
+        conn = _get_conn()
+        with conn:  # one transaction
+            _delete_product_rows(conn, [r["product_id"] for r in rows])
+            conn.executemany(
+                "INSERT INTO kg_products (product_id, title, category, price, kg_context) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (r["product_id"], r["title"], r["category"], r["price"], r["kg_context"])
+                    for r in rows
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO kg_category_terms (token, product_id) VALUES (?, ?)",
+                [
+                    (tok, r["product_id"])
+                    for r in rows
+                    for tok in normalize_tokens(r["category"])
+                ],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO kg_terms (token, product_id) VALUES (?, ?)",
+                [(tok, r["product_id"]) for r in rows for tok in r["terms"]],
+            )
+            conn.executemany(
+                "INSERT OR IGNORE INTO kg_features (name, rel, product_id) VALUES (?, ?, ?)",
+                [
+                    (name, FEATURE_REL_TYPES[group], r["product_id"])
+                    for r in rows
+                    for group, names in r["features"].items()
+                    for name in names
+                ],
+            )
+    return len(rows)
+
+
+def delete_products(product_ids: List[int]) -> int:
+    """Drop these products from the graph. Returns ids asked to delete."""
+    if not product_ids:
+        return 0
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            _delete_product_rows(conn, list(product_ids))
+    return len(product_ids)
+
+
+def count_products() -> int:
+    with _lock:
+        (n,) = _get_conn().execute("SELECT count(*) FROM kg_products").fetchone()
+    return int(n)
+
+
+def read_watermark() -> str | None:
+    """Sync watermark (ISO timestamp); None if never synced / old layout."""
+    with _lock:
+        row = _get_conn().execute(
+            "SELECT watermark, schema_version FROM kg_sync_state WHERE key = ?",
+            (_SYNC_STATE_KEY,),
+        ).fetchone()
+    return row[0] if row and row[1] == EMBEDDED_SCHEMA_VERSION else None
+
+
+def finish_sync(pg_ids: Set[int], newest_synced: datetime | None) -> int:
+    """
+    Same as graph.finish_incremental_kg_sync: drop products not in
+    `pg_ids`, advance the watermark. Returns number of deleted products.
+    """
+    with _lock:
+        conn = _get_conn()
+        with conn:
+            graph_ids = {pid for (pid,) in conn.execute("SELECT product_id FROM kg_products")}
+            stale = sorted(graph_ids - pg_ids)
+            _delete_product_rows(conn, stale)
+            if newest_synced is not None:
+                conn.execute(
+                    "INSERT OR REPLACE INTO kg_sync_state "
+                    "(key, watermark, schema_version, synced_at) VALUES (?, ?, ?, ?)",
+                    (
+                        _SYNC_STATE_KEY,
+                        newest_synced.isoformat(),
+                        EMBEDDED_SCHEMA_VERSION,
+                        datetime.utcnow().isoformat(),
+                    ),
+                )
+    return len(stale)
+
+
+# ---- reads ----
+
+
+def candidate_ids(
+    category_hint: str | None,
+    max_price: float | None,
+    tags: List[str],
+) -> List[int]:
+    """Same semantics as graph.get_candidate_product_ids_from_kg."""
+    category_tokens = normalize_tokens(category_hint) if category_hint else []
+    terms = normalize_tokens(" ".join(tags))
+
+    with _lock:
+        conn = _get_conn()
+        ids: set[int] | None = None
+        if category_hint:
+            ids = set()
+            if category_tokens:
+                ids = _ids_for_tokens(conn, "kg_category_terms", category_tokens)
+        if terms and (ids is None or ids):
+            found = _ids_for_tokens(conn, "kg_terms", terms)
+            ids = found if ids is None else ids & found
+        if max_price is not None:
+            if ids is None:
+                # price-only: unpriced products excluded
+                ids = {
+                    pid
+                    for (pid,) in conn.execute(
+                        "SELECT product_id FROM kg_products WHERE price <= ?",
+                        (max_price,),
+                    )
+                }
+            elif ids:
+                narrowed = sorted(ids)
+                ids = set()
+                for chunk in _chunks(narrowed):
+                    ids.update(
+                        pid
+                        for (pid,) in conn.execute(
+                            "SELECT product_id FROM kg_products "
+                            f"WHERE product_id IN ({_placeholders(chunk)}) "
+                            "AND (price IS NULL OR price <= ?)",
+                            [*chunk, max_price],
+                        )
+                    )
+    return sorted(ids or [])
+
+
+def context_by_product(product_ids: List[int]) -> Dict[int, str]:
+    ids = list(dict.fromkeys(product_ids))
+    contexts: Dict[int, str] = {}
+    with _lock:
+        conn = _get_conn()
+        for chunk in _chunks(ids):
+            for pid, text in conn.execute(
+                "SELECT product_id, kg_context FROM kg_products "
+                f"WHERE product_id IN ({_placeholders(chunk)})",
+                chunk,
+            ):
+                if text:
+                    contexts[pid] = text
+    return contexts
+
+
+def context_strings(product_ids: List[int]) -> List[str]:
+    """Legacy "Product / Categories / Features" strings."""
+    ids = list(dict.fromkeys(product_ids))
+    products: Dict[int, Tuple[str, str | None]] = {}
+    features: Dict[int, List[str]] = {}
+    with _lock:
+        conn = _get_conn()
+        for chunk in _chunks(ids):
+            marks = _placeholders(chunk)
+            for pid, title, category in conn.execute(
+                f"SELECT product_id, title, category FROM kg_products WHERE product_id IN ({marks})",
+                chunk,
+            ):
+                products[pid] = (title or "", category)
+            for pid, name in conn.execute(
+                f"SELECT product_id, name FROM kg_features WHERE product_id IN ({marks})",
+                chunk,
+            ):
+                features.setdefault(pid, []).append(name)
+
+    contexts: List[str] = []
+    for pid in ids:
+        if pid not in products:
+            continue
+        title, category = products[pid]
+        feats = list(dict.fromkeys(features.get(pid, [])))
+        contexts.append(
+            f"Product: {title}\n"
+            f"Categories: {category or 'N/A'}\n"
+            f"Features: {', '.join(feats) if feats else 'N/A'}"
+        )
+    return contexts
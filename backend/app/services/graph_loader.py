@@ -0,0 +1,93 @@
+# app/services/graph_loader.py
+"""
+DataLoader-style batching for KG reads.
+
+Concurrent searches (FastAPI threadpool) ask for context of overlapping
+product ids within a few milliseconds of each other. Instead of one Neo4j
+session + query per search, the first caller opens a batch, waits a short
+window for others to join, then runs ONE query for the union of ids and
+hands every caller its own slice of the result.
+"""
+from typing import Callable, Dict, Generic, Hashable, Iterable, List, Optional, TypeVar
+import threading
+
+from app.core import metrics
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class _Batch(Generic[K, V]):
+    def __init__(self):
+        self.keys: Dict[K, None] = {}  # insertion-ordered set
+        self.full = threading.Event()
+        self.done = threading.Event()
+        self.results: Dict[K, V] = {}
+        self.error: Optional[BaseException] = None
+
+
+class BatchLoader(Generic[K, V]):
+    """
+    batch_fn(keys) -> {key: value}; keys missing from the result are
+    simply absent for the caller too.
+
+    - window_seconds: how long the first caller waits for others to join
+    - max_batch_size: a batch is dispatched early once it has this many keys
+    """
+
+    def __init__(
+        self,
+        batch_fn: Callable[[List[K]], Dict[K, V]],
+        window_seconds: float = 0.005,
+        max_batch_size: int = 500,
+        timeout_seconds: float = 30.0,
+        name: str = "loader",
+    ):
+        self.batch_fn = batch_fn
+        self.window_seconds = window_seconds
+        self.max_batch_size = max(1, max_batch_size)
+        self.timeout_seconds = timeout_seconds
+        self.name = name
+        self._lock = threading.Lock()
+        self._open: Optional[_Batch[K, V]] = None
+
+    def load_many(self, keys: Iterable[K]) -> Dict[K, V]:
+        wanted = list(dict.fromkeys(keys))
+        if not wanted:
+            return {}
+
+        with self._lock:
+            batch = self._open
+            leader = batch is None
+            if leader:
+                batch = self._open = _Batch()
+            for key in wanted:
+                batch.keys[key] = None
+            if len(batch.keys) >= self.max_batch_size:
+                batch.full.set()
+        metrics.inc(f"{self.name}.requests")
+
+        if leader:
+            self._dispatch(batch)
+        elif not batch.done.wait(self.timeout_seconds):
+            raise TimeoutError(f"{self.name}: batch did not complete in {self.timeout_seconds}s")
+
+        if batch.error is not None:
+            raise batch.error
+        return {key: batch.results[key] for key in wanted if key in batch.results}
+
+    def _dispatch(self, batch: _Batch[K, V]) -> None:
+        batch.full.wait(self.window_seconds)
+        with self._lock:
+            # close the batch: later callers start a new one
+            if self._open is batch:
+                self._open = None
+            keys = list(batch.keys)
+        try:
+            batch.results = self.batch_fn(keys)
+        except BaseException as e:  # re-raised in every waiting caller
+            batch.error = e
+        finally:
+            batch.done.set()
+        metrics.inc(f"{self.name}.batches")
+        metrics.observe(f"{self.name}.batch_keys", len(keys))
@@ -0,0 +1,131 @@
+# app/services/graph_snapshot.py
+"""
+In-process snapshot of the (small) knowledge graph.
+
+Products, their categories / features / terms and prices are loaded once
+and kept in memory with inverted indexes from normalised tokens to
+product bitsets (NumPy bool arrays). Candidate and context lookups then
+cost a few array ops instead of Neo4j round trips.
+
+graph.py refreshes the snapshot periodically and uses it only while it's
+fresh (KG_SNAPSHOT_MAX_AGE_SECONDS); otherwise it falls back to Neo4j.
+"""
+from typing import Any, Dict, Iterable, List, Optional
+import time
+
+import numpy as np
+
+from app.services.graph_text import format_kg_context, normalize_tokens
+
+
+class GraphSnapshot:
+    """Immutable view of the KG; build a new one to refresh."""
+
+    def __init__(self, rows: Iterable[Dict[str, Any]]):
+        rows = [r for r in rows if r.get("id") is not None]
+        n = len(rows)
+
+        self.built_at = time.monotonic()
+        self.product_ids = np.array([int(r["id"]) for r in rows], dtype=np.int64)
+        self.index_of: Dict[int, int] = {
+            int(pid): i for i, pid in enumerate(self.product_ids)
+        }
+        self.prices = np.array(
+            [np.nan if r.get("price") is None else float(r["price"]) for r in rows],
+            dtype=np.float64,
+        )
+        self.titles: List[str] = [r.get("title") or "" for r in rows]
+        self.primary_categories: List[Optional[str]] = [r.get("category") for r in rows]
+        self.categories: List[List[str]] = [
+            [c for c in (r.get("categories") or []) if c] for r in rows
+        ]
+        self.features: List[List[str]] = [
+            [f for f in (r.get("features") or []) if f] for r in rows
+        ]
+        # precomputed at sync time (None for nodes written by older syncs)
+        self.contexts: List[Optional[str]] = [r.get("context") for r in rows]
+
+        # token → bitset over products
+        self.category_index: Dict[str, np.ndarray] = {}
+        self.term_index: Dict[str, np.ndarray] = {}
+        for i, r in enumerate(rows):
+            cat_text = " ".join(self.categories[i] or [r.get("category") or ""])
+            for tok in normalize_tokens(cat_text):
+                self._bitset(self.category_index, tok, n)[i] = True
+            for tok in r.get("terms") or []:
+                self._bitset(self.term_index, tok, n)[i] = True
+
+    @staticmethod
+    def _bitset(index: Dict[str, np.ndarray], token: str, n: int) -> np.ndarray:
+        bits = index.get(token)
+        if bits is None:
+            bits = index[token] = np.zeros(n, dtype=bool)
+        return bits
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @property
+    def age_seconds(self) -> float:
+        return time.monotonic() - self.built_at
+
+    def _any_of(self, index: Dict[str, np.ndarray], tokens: List[str]) -> np.ndarray:
+        mask = np.zeros(len(self), dtype=bool)
+        for tok in tokens:
+            bits = index.get(tok)
+            if bits is not None:
+                mask |= bits
+        return mask
+
+    def candidate_ids(
+        self,
+        category_hint: str | None,
+        max_price: float | None,
+        tags: List[str],
+    ) -> List[int]:
+        """Same semantics as the Neo4j lookup in graph.get_candidate_product_ids_from_kg."""
+        mask: Optional[np.ndarray] = None
+        if category_hint:
+            mask = self._any_of(self.category_index, normalize_tokens(category_hint))
+        terms = normalize_tokens(" ".join(tags))
+        if terms:
+            tag_mask = self._any_of(self.term_index, terms)
+            mask = tag_mask if mask is None else mask & tag_mask
+        if max_price is not None:
+            with np.errstate(invalid="ignore"):
+                affordable = self.prices <= max_price
+            if mask is None:
+                mask = affordable  # price-only: unpriced products excluded
+            else:
+                mask &= affordable | np.isnan(self.prices)
+        if mask is None:
+            return []
+        return sorted(self.product_ids[mask].tolist())
+
+    def context_by_product(self, product_ids: List[int]) -> Dict[int, str]:
+        contexts: Dict[int, str] = {}
+        for pid in product_ids:
+            i = self.index_of.get(pid)
+            if i is None:
+                continue
+            text = self.contexts[i] or format_kg_context(
+                self.primary_categories[i], self.categories[i], self.features[i]
+            )
+            if text:
+                contexts[pid] = text
+        return contexts
+
+    def context_strings(self, product_ids: List[int]) -> List[str]:
+        """Legacy "Product / Categories / Features" strings."""
+        contexts: List[str] = []
+        for pid in product_ids:
+            i = self.index_of.get(pid)
+            if i is None:
+                continue
+            cats, feats = self.categories[i], self.features[i]
+            contexts.append(
+                f"Product: {self.titles[i]}\n"
+                f"Categories: {', '.join(cats) if cats else 'N/A'}\n"
+                f"Features: {', '.join(feats) if feats else 'N/A'}"
+            )
+        return contexts
@@ -0,0 +1,188 @@
+# app/services/graph_text.py
+"""
+Text helpers shared by every KG backend (Neo4j service, in-process
+snapshot, embedded SQLite graph): token normalisation for category / tag
+matching, feature phrase normalisation, the compact per-product context
+text fed into RAG prompts and the per-product row all backends write.
+"""
+from typing import Any, Dict, List, Tuple
+import re
+
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+(?:-[a-z0-9]+)*")
+_TOKEN_STOPWORDS = {
+    "and", "the", "for", "with", "you", "your", "our", "this", "that",
+    "product", "products", "feature", "features", "function",
+}
+
+
+def _singular(tok: str) -> str:
+    # Deliberately crude: "hoodies" → "hoodie", "joggers" → "jogger".
+    # Applied to both indexed text and queries, so it only has to be consistent.
+    if len(tok) > 3 and tok.endswith("s") and not tok.endswith("ss"):
+        return tok[:-1]
+    return tok
+
+
+def normalize_tokens(text: str | None) -> List[str]:
+    """
+    Lowercase, split into words, singularise; hyphenated words also add
+    their parts and the joined form ("t-shirt" → t-shirt, shirt, tshirt).
+    Returns unique tokens in first-seen order.
+    """
+    if not text:
+        return []
+    out: List[str] = []
+    seen: set[str] = set()
+    for word in _TOKEN_RE.findall(text.lower()):
+        candidates = [word]
+        if "-" in word:
+            candidates += word.split("-") + [word.replace("-", "")]
+        for tok in candidates:
+            tok = _singular(tok)
+            if len(tok) < 3 or tok in _TOKEN_STOPWORDS or tok in seen:
+                continue
+            seen.add(tok)
+            out.append(tok)
+    return out
+
+
+# ---- feature phrases ----
+
+# Scraper keys → feature group (each group gets its own relationship type)
+FEATURE_GROUPS: Dict[str, str] = {
+    "product_features": "product",
+    "fabric_features": "fabric",
+    "function": "function",
+}
+FEATURE_REL_TYPES: Dict[str, str] = {
+    "product": "HAS_FEATURE",
+    "fabric": "HAS_FABRIC",
+    "function": "HAS_FUNCTION",
+}
+
+# Spelling / wording variants seen in scraped bullets → one canonical phrase
+_CANONICAL_FEATURES: List[Tuple[re.Pattern, str]] = [
+    (re.compile(p), canon)
+    for p, canon in [
+        (r"^(?:\d+\s*%\s*)?(?:pure\s+)?cotton(?: fabric)?$", "cotton"),
+        (r"^(?:\d+\s*%\s*)?polyester(?: fabric)?$", "polyester"),
+        (r"^(?:\d+\s*%\s*)?(?:elastane|spandex|lycra)$", "elastane"),
+        (r"^quick[\s-]?dry(?:ing)?(?: fabric)?$", "quick dry"),
+        (r"^(?:moisture|sweat)[\s-]?wick(?:ing)?$", "moisture wicking"),
+        (r"^(?:4|four)[\s-]?way[\s-]?stretch$", "4-way stretch"),
+        (r"^(?:2|two)[\s-]?way[\s-]?stretch$", "2-way stretch"),
+        (r"^anti[\s-]?(?:odou?r|microbial|bacterial)$", "anti odour"),
+        (r"^breathable(?: fabric)?$", "breathable"),
+        (r"^light[\s-]?weight$", "lightweight"),
+        (r"^over[\s-]?sized?(?: fit)?$", "oversized fit"),
+        (r"^relaxed(?: fit)?$", "relaxed fit"),
+        (r"^regular(?: fit)?$", "regular fit"),
+        (r"^slim(?: fit)?$", "slim fit"),
+    ]
+]
+
+_FEATURE_SPLIT_RE = re.compile(r"\s*(?:[,;/|•]|\s&\s|\sand\s)\s*")
+_FEATURE_STRIP_RE = re.compile(r"[^a-z0-9%\s-]")
+_FEATURE_FILLER_RE = re.compile(r"^(?:made (?:with|of|from)|features?|with|in|has)\s+")
+_MAX_FEATURE_WORDS = 5
+
+
+def normalize_feature_phrase(text: str) -> str | None:
+    """
+    One atomic, canonical feature phrase ("Quick-Drying" → "quick dry"),
+    or None for fragments too short or too long to be shared across
+    products (long bullets are descriptions, not features).
+    """
+    phrase = _FEATURE_STRIP_RE.sub(" ", text.lower())
+    phrase = " ".join(phrase.split())
+    phrase = _FEATURE_FILLER_RE.sub("", phrase)
+    for pattern, canon in _CANONICAL_FEATURES:
+        if pattern.match(phrase):
+            return canon
+    if len(phrase) < 3 or len(phrase.split()) > _MAX_FEATURE_WORDS:
+        return None
+    return phrase
+
+
+def explode_features(features: Any) -> List[Tuple[str, str]]:
+    """
+    Scraped features (dict of lists per group, list, or comma string) →
+    unique (group, phrase) pairs, first-seen order. Unknown dict keys and
+    flat lists/strings land in the "product" group.
+    """
+    if isinstance(features, dict):
+        grouped = [
+            (FEATURE_GROUPS.get(str(k), "product"), v) for k, v in features.items()
+        ]
+    elif features:
+        grouped = [("product", features)]
+    else:
+        return []
+
+    out: List[Tuple[str, str]] = []
+    seen: set[Tuple[str, str]] = set()
+    for group, values in grouped:
+        if isinstance(values, str):
+            values = [values]
+        elif not isinstance(values, (list, tuple)):
+            continue
+        for value in values:
+            for part in _FEATURE_SPLIT_RE.split(str(value)):
+                phrase = normalize_feature_phrase(part)
+                if phrase and (group, phrase) not in seen:
+                    seen.add((group, phrase))
+                    out.append((group, phrase))
+    return out
+
+
+def format_kg_context(
+    primary_category: str | None,
+    categories: List[str],
+    features: List[str],
+) -> str:
+    """
+    Compact KG text for one product. Title and the product's own category
+    are already in the vector payload, so only *extra* categories and the
+    features are emitted here (keeps RAG prompts short).
+    """
+    extra_cats = [c for c in categories if c and c != primary_category]
+    lines: List[str] = []
+    if extra_cats:
+        lines.append(f"Also in: {', '.join(extra_cats)}")
+    if features:
+        lines.append(f"Features: {'; '.join(features)}")
+    return "\n".join(lines)
+
+
+def product_features_by_group(product: Any) -> Dict[str, List[str]]:
+    """Canonical feature phrases per group (see explode_features)."""
+    grouped: Dict[str, List[str]] = {group: [] for group in FEATURE_REL_TYPES}
+    for group, phrase in explode_features(product.features):
+        grouped[group].append(phrase)
+    return grouped
+
+
+def product_graph_row(product: Any) -> Dict[str, Any]:
+    """Everything a KG backend stores for one Product (ORM object)."""
+    features = product_features_by_group(product)
+    phrases = list(dict.fromkeys(f for group in features.values() for f in group))
+    # Normalised tokens from title + features + description → (:Term)
+    # nodes, so tag lookups are index seeks on Term.value instead of
+    # CONTAINS scans (the old Cypher also matched tags in the description)
+    terms = normalize_tokens(
+        " ".join([product.title or "", *phrases, product.description or ""])
+    )
+    category = product.category or None
+    return {
+        "product_id": product.id,
+        "title": product.title,
+        "category": category,
+        "price": float(product.price) if product.price is not None else None,
+        "features": features,
+        "terms": terms,
+        # RAG context text precomputed here, so reads are a property lookup
+        "kg_context": format_kg_context(
+            category, [category] if category else [], phrases
+        ),
+    }
@@ -0,0 +1,93 @@
+# app/services/lexical_search.py
+"""
+Postgres full-text (lexical) product search.
+
+`products.search_tsv` is a generated tsvector (migration 0004) over
+title (weight A), category (B), features (C) and description (D) with a
+GIN index. No model, no network hop besides Postgres: used as a cheap
+first stage merged with vector hits, and as the fallback when Qdrant or
+the embedder is down.
+"""
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import func, literal_column, select
+from sqlalchemy.orm import Session
+
+from app.models.product import Product
+from app.services.graph_text import normalize_tokens
+
+_SEARCH_TSV = literal_column("products.search_tsv")
+
+# Chat filler the 'english' config doesn't treat as stopwords
+_QUERY_FILLER = {"show", "want", "need", "please", "something", "looking", "find", "give"}
+
+
+def _or_tsquery_text(query: str) -> str | None:
+    """
+    "oversized hoodies for gym" → "oversized | hoodie | gym".
+
+    OR instead of websearch_to_tsquery's AND: chatty queries ("show me
+    something for winter under 2000") would otherwise match nothing;
+    ts_rank still puts products matching more terms first. Tokens are
+    [a-z0-9] only, so the string is always valid tsquery syntax.
+    """
+    tokens = [
+        t for t in normalize_tokens(query)
+        if "-" not in t and t not in _QUERY_FILLER
+    ]
+    return " | ".join(tokens) if tokens else None
+
+
+def lexical_search(
+    db: Session,
+    query: str,
+    limit: int = 20,
+    max_price: Optional[float] = None,
+    category: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Ranked full-text matches as search hits ({id, title, category, price,
+    description, summary, image_url, product_url, rank}), best first.
+    `category` is an exact products.category filter.
+    """
+    tsquery_text = _or_tsquery_text(query)
+    if not tsquery_text:
+        return []
+
+    tsquery = func.to_tsquery("english", tsquery_text)
+    rank = func.ts_rank(_SEARCH_TSV, tsquery).label("rank")
+    stmt = (
+        select(
+            Product.id,
+            Product.title,
+            Product.category,
+            Product.price,
+            Product.description,
+            Product.stylist_summary,
+            Product.image_url,
+            Product.product_url,
+            rank,
+        )
+        .where(_SEARCH_TSV.op("@@")(tsquery))
+        .order_by(rank.desc(), Product.id)
+        .limit(limit)
+    )
+    if max_price is not None:
+        stmt = stmt.where(Product.price <= max_price)
+    if category:
+        stmt = stmt.where(Product.category == category)
+
+    return [
+        {
+            "id": row.id,
+            "title": row.title or "",
+            "category": row.category or "",
+            "price": row.price,
+            "description": row.description or "",
+            "summary": row.stylist_summary or "",
+            "image_url": row.image_url or "",
+            "product_url": row.product_url or "",
+            "rank": float(row.rank or 0.0),
+        }
+        for row in db.execute(stmt)
+    ]
@@ -1,20 +1,287 @@
 # app/services/llm.py
-from typing import List, Optional
+from typing import Dict, List, Optional, Any, Set, Tuple
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ThreadPoolExecutor,
+    wait,
+)
+import json
 import logging
+import re
+import threading
+import time
 
-from groq import Groq
-from openai import OpenAI, RateLimitError, APIError
+from openai import RateLimitError, APIError
 
+from app.core import metrics
 from app.core.config import settings
+from app.services.llm_providers import LLMProvider, build_providers
+from app.services.rag_context import count_tokens
 
 logger = logging.getLogger(__name__)
 
-# Initialize clients
-groq_client = Groq(api_key=settings.GROQ_API_KEY)
-openai_client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
-PRIMARY_MODEL = "llama-3.1-8b-instant"  # 🚀 fastest, cheaper, works great
-FALLBACK_MODEL = "gpt-4.1-mini"        # light fallback
+# ---------------------------------------------------------
+#   Circuit breaker + provider manager
+# ---------------------------------------------------------
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised when every provider is short-circuited by its breaker."""
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker:
+    - closed    → requests flow, consecutive failures are counted
+    - open      → requests are rejected until the cooldown is over
+    - half_open → exactly one probe request is let through; success closes
+                  the breaker, failure opens it again for another cooldown
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, cooldown_seconds: float):
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.cooldown_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+
+            # half-open: only one probe at a time
+            if self._probe_in_flight:
+                return False
+            self._probe_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            if (
+                self._state == self.HALF_OPEN
+                or self._failures >= self.failure_threshold
+            ):
+                if self._state != self.OPEN:
+                    logger.warning("🔌 Circuit opened after %s failures", self._failures)
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+
+class _ProviderSlot:
+    """One entry of the fallback chain: a provider + its breaker + stats."""
+
+    def __init__(self, provider: LLMProvider):
+        self.provider = provider
+        self.name = provider.name
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.LLM_BREAKER_FAILURE_THRESHOLD,
+            cooldown_seconds=settings.LLM_BREAKER_COOLDOWN_SECONDS,
+        )
+        self.calls = 0
+        self.successes = 0
+        self.failures = 0
+        self.rejected = 0
+        self.last_error: Optional[str] = None
+        self.latencies: deque[float] = deque(maxlen=200)
+        self._lock = threading.Lock()
+
+    def run(self, prompt: str, json_mode: bool = False) -> str:
+        start = time.perf_counter()
+        try:
+            text = self.provider.complete(prompt, json_mode=json_mode)
+        except Exception as e:
+            elapsed = time.perf_counter() - start
+            self.breaker.record_failure()
+            with self._lock:
+                self.calls += 1
+                self.failures += 1
+                self.last_error = f"{type(e).__name__}: {e}"
+                self.latencies.append(elapsed)
+            raise
+
+        elapsed = time.perf_counter() - start
+        self.breaker.record_success()
+        with self._lock:
+            self.calls += 1
+            self.successes += 1
+            self.latencies.append(elapsed)
+        return text
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = sorted(self.latencies)
+            calls, successes, failures = self.calls, self.successes, self.failures
+            rejected, last_error = self.rejected, self.last_error
+
+        def pct(q: float) -> Optional[float]:
+            if not lat:
+                return None
+            return round(lat[min(len(lat) - 1, int(q * len(lat)))] * 1000, 1)
+
+        return {
+            "state": self.breaker.state,
+            "calls": calls,
+            "successes": successes,
+            "failures": failures,
+            "rejected_by_breaker": rejected,
+            "error_rate": round(failures / calls, 3) if calls else 0.0,
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "last_error": last_error,
+        }
+
+
+class LLMProviderManager:
+    """
+    Runs a prompt through an ordered provider chain.
+
+    Sequential mode (default): try providers in order, skipping any whose
+    breaker is open, so a Groq outage costs nothing once the breaker trips.
+
+    Hedged mode: start the first provider, and if it hasn't answered after
+    `hedge_delay` seconds also start the next one; the first successful
+    answer wins. The slower call keeps running in the background only to
+    record its outcome in the stats/breaker.
+    """
+
+    def __init__(
+        self,
+        providers: List[LLMProvider],
+        hedge_enabled: bool = False,
+        hedge_delay: float = 2.0,
+        hedge_max_concurrency: int = 16,
+    ):
+        self.slots = [_ProviderSlot(provider) for provider in providers]
+        self.hedge_enabled = hedge_enabled
+        self.hedge_delay = hedge_delay
+        self.hedge_max_concurrency = hedge_max_concurrency
+        self.hedges_fired = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def _acquire(self, slot: _ProviderSlot) -> bool:
+        # Ask the breaker only right before a call, so a half-open probe
+        # slot is never reserved for a provider we end up not calling.
+        if slot.breaker.allow_request():
+            return True
+        with slot._lock:
+            slot.rejected += 1
+        return False
+
+    def complete(self, prompt: str, json_mode: bool = False) -> str:
+        if self.hedge_enabled and len(self.slots) > 1:
+            return self._complete_hedged(prompt, json_mode)
+        return self._complete_sequential(prompt, json_mode)
+
+    def _complete_sequential(self, prompt: str, json_mode: bool) -> str:
+        last_exc: Optional[Exception] = None
+        for slot in self.slots:
+            if not self._acquire(slot):
+                continue
+            try:
+                logger.info(f"🧠 Using LLM provider: {slot.name}")
+                return slot.run(prompt, json_mode)
+            except Exception as e:
+                logger.error(f"⚠️ {slot.name} failed, trying next provider: {e}")
+                last_exc = e
+        raise last_exc or CircuitOpenError("All LLM providers are short-circuited")
+
+    def _complete_hedged(self, prompt: str, json_mode: bool) -> str:
+        if self._executor is None:
+            # every in-flight call can occupy one thread per provider
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.hedge_max_concurrency) * len(self.slots),
+                thread_name_prefix="llm-hedge",
+            )
+
+        pending_slots = list(self.slots)
+        in_flight: Dict[Future, _ProviderSlot] = {}
+        last_exc: Optional[Exception] = None
+
+        def launch_next() -> None:
+            while pending_slots:
+                slot = pending_slots.pop(0)
+                if self._acquire(slot):
+                    logger.info(f"🧠 Using LLM provider: {slot.name}")
+                    in_flight[self._executor.submit(slot.run, prompt, json_mode)] = slot
+                    return
+
+        launch_next()
+        while in_flight:
+            timeout = self.hedge_delay if pending_slots else None
+            done, _ = wait(list(in_flight), timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # Primary is slow → hedge with the next provider
+                self.hedges_fired += 1
+                metrics.inc("llm.hedges_fired")
+                launch_next()
+                continue
+
+            for fut in done:
+                slot = in_flight.pop(fut)
+                try:
+                    return fut.result()
+                except Exception as e:
+                    logger.error(f"⚠️ {slot.name} failed during hedged call: {e}")
+                    last_exc = e
+
+            # Every finished call failed — don't wait for the hedge delay
+            if not in_flight:
+                launch_next()
+
+        raise last_exc or CircuitOpenError("All LLM providers are short-circuited")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": "hedged" if self.hedge_enabled else "sequential",
+            "hedges_fired": self.hedges_fired,
+            "providers": {slot.name: slot.stats() for slot in self.slots},
+        }
+
+
+# Provider chain comes from settings.LLM_PROVIDERS (e.g. "groq,openai"
+# in prod, "standin" for offline load tests)
+llm_manager = LLMProviderManager(
+    providers=build_providers(),
+    hedge_enabled=settings.LLM_HEDGE_ENABLED,
+    hedge_delay=settings.LLM_HEDGE_DELAY_SECONDS,
+    hedge_max_concurrency=settings.LLM_HEDGE_MAX_CONCURRENCY,
+)
+metrics.register_collector("llm", llm_manager.stats)
+
+
+def get_llm_stats() -> Dict[str, Any]:
+    """Per-provider latency / error / breaker stats."""
+    return llm_manager.stats()
 
 
 def _build_prompt(question: str, chunks: List[str]) -> str:
@@ -22,7 +289,7 @@ def _build_prompt(question: str, chunks: List[str]) -> str:
     context = "\n\n---\n\n".join(chunks[:40])
     return (
         "You are an AI fashion stylist. You must recommend outfits ONLY using the "
-        "products listed in the context below.\n\n"
+        "products listed in the context below. Each product starts with its [ID n].\n\n"
         "Rules:\n"
         "- Suggest 2–4 suitable products from the context.\n"
         "- If no exact match exists, recommend closest alternatives.\n"
@@ -30,57 +297,132 @@ def _build_prompt(question: str, chunks: List[str]) -> str:
         "- Keep the message short.\n\n"
         f"Context:\n{context}\n\n"
         f"User query: {question}\n\n"
-        "Now give a short, friendly recommendation:"
+        "Reply with a single JSON object and nothing else:\n"
+        '{"answer": "<short, friendly recommendation>", '
+        '"product_ids": [<IDs of the recommended products, best first>]}'
     )
 
 
-def answer_with_rag(question: str, chunks: List[str]) -> Optional[str]:
-    if not chunks:
-        return None
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.DOTALL)
+# "answer" string out of a truncated / otherwise broken JSON object
+_ANSWER_FIELD_RE = re.compile(r'"answer"\s*:\s*"((?:[^"\\]|\\.)*)"', re.DOTALL)
 
-    prompt = _build_prompt(question, chunks)
 
-    # 🔹 First: Try Groq Instant model
+def parse_structured_answer(
+    raw: str,
+    candidate_ids: Set[int],
+) -> Optional[Tuple[str, List[int]]]:
+    """
+    Parse + validate the JSON payload from the LLM.
+
+    Returns (answer_text, product_ids) where product_ids only contains ids
+    from candidate_ids (order kept, duplicates dropped), or None when the
+    payload is not usable.
+    """
+    if not raw:
+        return None
     try:
-        logger.info("🧠 Using Groq — llama-3.1-8b-instant")
-        resp = groq_client.chat.completions.create(
-            model=PRIMARY_MODEL,
-            messages=[
-                {"role": "system", "content": "You are a helpful fashion stylist."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=300,  # required for Groq API
-        )
-        return resp.choices[0].message.content.strip()
+        data = json.loads(raw)
+    except ValueError:
+        # Some models wrap the object in prose / code fences
+        m = _JSON_OBJECT_RE.search(raw)
+        if not m:
+            return None
+        try:
+            data = json.loads(m.group(0))
+        except ValueError:
+            return None
 
-    except Exception as e:
-        logger.error(f"⚠️ Groq failed! Switching to OpenAI: {e}")
+    if not isinstance(data, dict):
+        return None
+    answer = data.get("answer")
+    if not isinstance(answer, str) or not answer.strip():
+        return None
 
-    # 🔹 Then: fallback only if Groq failed
-    try:
-        logger.info("🪂 Using OpenAI fallback — GPT-4.1-mini")
-        resp = openai_client.chat.completions.create(
-            model=FALLBACK_MODEL,
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.2,
-            max_tokens=300,
-        )
-        return resp.choices[0].message.content.strip()
+    ids: List[int] = []
+    raw_ids = data.get("product_ids")
+    if isinstance(raw_ids, list):
+        for value in raw_ids:
+            try:
+                pid = int(value)
+            except (TypeError, ValueError):
+                continue
+            if pid in candidate_ids and pid not in ids:
+                ids.append(pid)
+
+    return answer.strip(), ids
+
+
+def _salvage_answer(raw: str) -> str:
+    """
+    Best-effort answer text from a payload parse_structured_answer rejected.
+    Never returns "" — the user always gets a reply.
+    """
+    text = (raw or "").strip()
+    if text and not text.startswith("{"):
+        return text
+    # Don't show a half-broken JSON blob to the user
+    m = _ANSWER_FIELD_RE.search(text)
+    if m:
+        try:
+            answer = json.loads(f'"{m.group(1)}"').strip()
+        except ValueError:
+            answer = m.group(1).strip()
+        if answer:
+            return answer
+    return "Here are some products that match your request!"
 
-    except RateLimitError as e:
-        logger.warning(f"OpenAI quota exceeded: {e}")
+
+def _fallback_message(e: Exception) -> str:
+    """User-facing text when every provider failed."""
+    if isinstance(e, (CircuitOpenError, RateLimitError)):
+        logger.warning(f"LLM providers unavailable / over quota: {e}")
         return (
             "I'm unable to generate the full recommendation right now — "
             "but these products match your request!"
         )
-
-    except APIError as e:
+    if isinstance(e, APIError):
         logger.error(f"OpenAI API error: {e}")
         return (
             "Model response failed — but you can still explore the suggested products!"
         )
+    logger.error(f"Unexpected LLM error: {e}")
+    return "I'm having trouble responding right now."
+
+
+def recommend_with_rag(
+    question: str,
+    chunks: List[str],
+    candidate_ids: List[int],
+) -> Tuple[Optional[str], Optional[List[int]]]:
+    """
+    Ask the LLM for a recommendation over the RAG context (JSON mode).
 
+    Returns (answer_text, recommended_ids). recommended_ids is None when
+    the model's payload could not be parsed or named no valid candidate —
+    callers should then fall back to text-based re-ranking.
+    """
+    if not chunks:
+        return None, None
+
+    prompt = _build_prompt(question, chunks)
+    metrics.observe("llm.prompt_tokens", count_tokens(prompt))
+
+    try:
+        raw = llm_manager.complete(prompt, json_mode=True)
     except Exception as e:
-        logger.error(f"Unexpected LLM error: {e}")
-        return "I'm having trouble responding right now."
+        return _fallback_message(e), None
+
+    parsed = parse_structured_answer(raw, set(candidate_ids))
+    if parsed is None:
+        metrics.inc("llm.structured_parse_failures")
+        logger.warning("LLM returned unusable JSON payload, using raw text")
+        return _salvage_answer(raw), None
+
+    answer, ids = parsed
+    if not ids:
+        metrics.inc("llm.structured_no_valid_ids")
+        return answer, None
+
+    metrics.inc("llm.structured_ok")
+    return answer, ids
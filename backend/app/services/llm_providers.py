@@ -0,0 +1,169 @@
+# app/services/llm_providers.py
+"""
+LLM provider interface.
+
+Every backend we talk to speaks the OpenAI chat-completions protocol
+(Groq, OpenAI, and our local stand-in in `loadtest/llm_standin.py`),
+so one base class covers all of them; subclasses only decide which
+client, model and messages to use. Which providers are used — and in
+what fallback order — comes from `settings.LLM_PROVIDERS`.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, List, Optional, Type
+
+from app.core.config import settings
+
+
+class LLMProvider(ABC):
+    """Base provider: lazily built client + complete/stream helpers."""
+
+    name: str = "base"
+    system_prompt: Optional[str] = None
+
+    def __init__(self, model: str):
+        self.model = model
+        self._client: Any = None
+
+    @abstractmethod
+    def _build_client(self) -> Any:
+        """OpenAI-compatible client for this provider."""
+
+    @property
+    def client(self) -> Any:
+        # Built on first use so a missing API key only affects this provider
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    def _messages(self, prompt: str) -> List[Dict[str, str]]:
+        messages: List[Dict[str, str]] = []
+        if self.system_prompt:
+            messages.append({"role": "system", "content": self.system_prompt})
+        messages.append({"role": "user", "content": prompt})
+        return messages
+
+    def complete(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 300,
+        json_mode: bool = False,
+    ) -> str:
+        extra: Dict[str, Any] = {}
+        if json_mode:
+            # JSON mode: the model must return one valid JSON object
+            extra["response_format"] = {"type": "json_object"}
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            **extra,
+        )
+        return (resp.choices[0].message.content or "").strip()
+
+    def stream(
+        self,
+        prompt: str,
+        temperature: float = 0.2,
+        max_tokens: int = 300,
+    ) -> Iterator[str]:
+        """Yield answer text deltas as they arrive."""
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+        )
+        for chunk in resp:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+    system_prompt = "You are a helpful fashion stylist."
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model or settings.GROQ_MODEL)
+
+    def _build_client(self) -> Any:
+        from groq import Groq
+
+        return Groq(
+            api_key=settings.GROQ_API_KEY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+        )
+
+
+class OpenAIProvider(LLMProvider):
+    name = "openai"
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model or settings.OPENAI_MODEL)
+
+    def _build_client(self) -> Any:
+        from openai import OpenAI
+
+        return OpenAI(
+            api_key=settings.OPENAI_API_KEY,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+        )
+
+
+class StandInProvider(LLMProvider):
+    """
+    Local OpenAI-compatible stand-in (see loadtest/llm_standin.py).
+    Deterministic answers, configurable latency — for offline load tests.
+    """
+
+    name = "standin"
+    system_prompt = "You are a helpful fashion stylist."
+
+    def __init__(self, model: Optional[str] = None):
+        super().__init__(model or "standin")
+
+    def _build_client(self) -> Any:
+        from openai import OpenAI
+
+        return OpenAI(
+            api_key="standin",
+            base_url=settings.LLM_STANDIN_URL,
+            timeout=settings.LLM_TIMEOUT_SECONDS,
+            max_retries=settings.LLM_MAX_RETRIES,
+        )
+
+
+PROVIDER_REGISTRY: Dict[str, Type[LLMProvider]] = {
+    GroqProvider.name: GroqProvider,
+    OpenAIProvider.name: OpenAIProvider,
+    StandInProvider.name: StandInProvider,
+}
+
+
+def build_providers(spec: Optional[str] = None) -> List[LLMProvider]:
+    """
+    Build the provider chain from a comma separated spec,
+    e.g. "groq,openai" (default) or "standin".
+    """
+    spec = spec if spec is not None else settings.LLM_PROVIDERS
+    providers: List[LLMProvider] = []
+    for raw in spec.split(","):
+        name = raw.strip().lower()
+        if not name:
+            continue
+        if name not in PROVIDER_REGISTRY:
+            raise ValueError(
+                f"Unknown LLM provider '{name}'. "
+                f"Choose from: {', '.join(PROVIDER_REGISTRY)}"
+            )
+        providers.append(PROVIDER_REGISTRY[name]())
+    if not providers:
+        raise ValueError("LLM_PROVIDERS must name at least one provider")
+    return providers
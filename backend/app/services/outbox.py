@@ -0,0 +1,242 @@
+# app/services/outbox.py
+"""
+Write-through indexing (transactional outbox).
+
+Product create / update (services/products.py) add a `product_outbox`
+row in the SAME transaction as the product change, so either both commit
+or neither does. A background thread drains the table in batches:
+
+1. claim due rows (FOR UPDATE SKIP LOCKED — several API instances can
+   drain in parallel without indexing the same event twice)
+2. load the products' current state, embed them with ONE encode call,
+   upsert into Qdrant and MERGE into the KG
+3. delete the rows; on failure bump `attempts` and push `available_at`
+   back (exponential backoff). After OUTBOX_MAX_ATTEMPTS a row is left
+   alone with its last_error (dead letter).
+
+Idempotent end to end: events carry only the product id, Qdrant points
+are keyed by product id and the KG write is a MERGE, so a re-delivered
+event (e.g. crash between indexing and commit) rewrites the same data.
+Products deleted in the meantime are removed from both indexes.
+"""
+from datetime import timedelta
+from typing import Dict, Iterable, List
+import threading
+import time
+
+from sqlalchemy import DateTime, delete, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.models.product import Product
+from app.models.product_outbox import ProductOutbox
+from app.services.embeddings import delete_products_from_qdrant, upsert_products_to_qdrant
+from app.services.graph import (
+    delete_products_from_graph,
+    refresh_kg_snapshot,
+    upsert_products_to_graph,
+)
+
+_worker_thread: threading.Thread | None = None
+_stop = threading.Event()
+# set after a local commit → the worker doesn't wait for the next poll
+_wake = threading.Event()
+
+
+# created_at / available_at are filled by the DB's now() in a TIMESTAMP
+# (no time zone) column, i.e. in the server's session time zone. So every
+# comparison uses the DB clock too, never Python's — otherwise a non-UTC
+# server shifts claims, backoff and lag by its UTC offset.
+# clock_timestamp(): wall time *now*, not the start of the transaction
+# (indexing a batch can take a while).
+def _db_now():
+    return func.clock_timestamp(type_=DateTime)
+
+
+def _seconds_since(column):
+    return func.extract("epoch", _db_now() - column)
+
+
+def enqueue_product_changes(db: Session | AsyncSession, product_ids: Iterable[int]) -> None:
+    """
+    Add outbox rows to the caller's session. Does NOT commit — the caller
+    commits them together with the product change.
+    """
+    db.add_all([ProductOutbox(product_id=pid, op="upsert") for pid in product_ids])
+
+
+def notify_worker() -> None:
+    """Call after committing outbox rows (wakes this process' worker)."""
+    _wake.set()
+
+
+def _claim_stmt(batch_size: int):
+    return (
+        select(ProductOutbox)
+        .where(
+            ProductOutbox.available_at <= _db_now(),
+            ProductOutbox.attempts < settings.OUTBOX_MAX_ATTEMPTS,
+        )
+        .order_by(ProductOutbox.available_at, ProductOutbox.id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+
+
+def _index(db: Session, product_ids: List[int]) -> Dict[str, int]:
+    """Bring Qdrant + KG in line with the current rows of these products."""
+    products = list(
+        db.execute(select(Product).where(Product.id.in_(product_ids))).scalars()
+    )
+    found = {p.id for p in products}
+    gone = [pid for pid in product_ids if pid not in found]
+
+    upsert_products_to_qdrant(products)
+    upsert_products_to_graph(products)
+    if gone:
+        delete_products_from_qdrant(gone)
+        delete_products_from_graph(gone)
+    return {"indexed": len(products), "removed": len(gone)}
+
+
+def _retry_delay(attempts: int) -> float:
+    delay = settings.OUTBOX_RETRY_BASE_SECONDS * (2 ** (attempts - 1))
+    return min(delay, settings.OUTBOX_RETRY_MAX_SECONDS)
+
+
+def _mark_failed(rows: List[ProductOutbox], error: Exception) -> None:
+    for row in rows:
+        row.attempts += 1
+        row.last_error = f"{type(error).__name__}: {error}"[:2000]
+        row.available_at = _db_now() + timedelta(seconds=_retry_delay(row.attempts))
+        if row.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            metrics.inc("outbox.dead_lettered")
+            print(
+                f"❌ Outbox event {row.id} (product {row.product_id}) gave up after "
+                f"{row.attempts} attempts: {row.last_error}"
+            )
+    metrics.inc("outbox.failures", len(rows))
+
+
+def process_outbox_batch(db: Session, batch_size: int | None = None) -> Dict[str, int]:
+    """
+    Claim and index one batch. Returns {claimed, indexed, removed, failed}.
+
+    Fresh events go through as ONE batch. Events that already failed
+    once are retried one product at a time, so a single bad product
+    can't keep failing the whole batch.
+    """
+    stats = {"claimed": 0, "indexed": 0, "removed": 0, "failed": 0}
+    rows = list(db.execute(_claim_stmt(batch_size or settings.OUTBOX_BATCH_SIZE)).scalars())
+    if not rows:
+        db.rollback()
+        return stats
+    stats["claimed"] = len(rows)
+
+    groups: Dict[int, List[ProductOutbox]] = {}
+    for row in rows:
+        groups.setdefault(row.product_id, []).append(row)
+    fresh = [pid for pid, evs in groups.items() if all(ev.attempts == 0 for ev in evs)]
+    retried = [pid for pid in groups if pid not in fresh]
+    units = ([fresh] if fresh else []) + [[pid] for pid in retried]
+
+    done: List[ProductOutbox] = []
+    start = time.perf_counter()
+    for product_ids in units:
+        unit_rows = [row for pid in product_ids for row in groups[pid]]
+        try:
+            result = _index(db, product_ids)
+        except Exception as e:
+            print(f"⚠️ Outbox indexing failed for {len(product_ids)} product(s): {e}")
+            _mark_failed(unit_rows, e)
+            stats["failed"] += len(unit_rows)
+            continue
+        stats["indexed"] += result["indexed"]
+        stats["removed"] += result["removed"]
+        done.extend(unit_rows)
+
+    if done:
+        delays = db.execute(
+            delete(ProductOutbox)
+            .where(ProductOutbox.id.in_([row.id for row in done]))
+            .returning(_seconds_since(ProductOutbox.created_at))
+        ).scalars()
+        for delay in delays:
+            metrics.observe("outbox.index_delay_seconds", float(delay))
+    db.commit()
+
+    metrics.inc("outbox.indexed", stats["indexed"])
+    metrics.inc("outbox.removed", stats["removed"])
+    metrics.observe("outbox.batch_size", len(rows))
+    metrics.observe("outbox.batch_seconds", time.perf_counter() - start)
+    return stats
+
+
+def outbox_lag(db: Session) -> Dict[str, float]:
+    """pending / dead-lettered counts and age of the oldest pending event."""
+    live = ProductOutbox.attempts < settings.OUTBOX_MAX_ATTEMPTS
+    pending, lag = db.execute(
+        select(
+            func.count(ProductOutbox.id),
+            _seconds_since(func.min(ProductOutbox.created_at)),
+        ).where(live)
+    ).one()
+    dead = db.execute(select(func.count(ProductOutbox.id)).where(~live)).scalar_one()
+    db.rollback()  # end the read transaction
+    return {"pending": pending, "dead": dead, "lag_seconds": max(0.0, float(lag or 0.0))}
+
+
+def _record_lag(db: Session) -> Dict[str, float]:
+    lag = outbox_lag(db)
+    metrics.set_gauge("outbox.pending", lag["pending"])
+    metrics.set_gauge("outbox.dead", lag["dead"])
+    metrics.set_gauge("outbox.lag_seconds", lag["lag_seconds"])
+    return lag
+
+
+def _worker_loop() -> None:
+    kg_dirty = False
+    while not _stop.is_set():
+        claimed = 0
+        db = SessionLocal()
+        try:
+            stats = process_outbox_batch(db)
+            claimed = stats["claimed"]
+            kg_dirty = kg_dirty or bool(stats["indexed"] or stats["removed"])
+            _record_lag(db)
+            # once nothing is due any more, let KG snapshot lookups see the burst
+            if kg_dirty and not claimed:
+                refresh_kg_snapshot()
+                kg_dirty = False
+        except Exception as e:
+            db.rollback()
+            print("⚠️ Outbox worker error:", e)
+        finally:
+            db.close()
+
+        if not claimed:
+            _wake.wait(max(0.1, settings.OUTBOX_POLL_SECONDS))
+            _wake.clear()
+
+
+def start_outbox_worker() -> None:
+    """Start the background drain thread (idempotent)."""
+    global _worker_thread
+    if not settings.OUTBOX_WORKER_ENABLED:
+        return
+    if _worker_thread is not None and _worker_thread.is_alive():
+        return
+    _stop.clear()
+    _worker_thread = threading.Thread(target=_worker_loop, name="product-outbox", daemon=True)
+    _worker_thread.start()
+
+
+def stop_outbox_worker(timeout: float = 10.0) -> None:
+    """Let the current batch finish, then stop the thread."""
+    _stop.set()
+    _wake.set()
+    if _worker_thread is not None:
+        _worker_thread.join(timeout)
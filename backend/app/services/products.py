@@ -1,35 +1,178 @@
-from typing import List, Optional
-from sqlalchemy.orm import Session
+from datetime import datetime
+from typing import List, Optional, Sequence, Tuple
+import base64
+import binascii
+import hashlib
+import json
+
+from sqlalchemy import Select, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
 from fastapi import HTTPException, status
 
 from app import models
-from app.schemas.product import ProductCreate, ProductUpdate
+from app.core import http_cache, metrics
+from app.core.cache import LRUCache
+from app.core.config import settings
+from app.schemas.product import ProductCreate, ProductOut, ProductUpdate
+from app.services import outbox
+
+# Hot products, already serialised (ProductOut), for the batch endpoint.
+# Per process with a short TTL; updates through this service invalidate.
+_product_cache = LRUCache(
+    maxsize=settings.PRODUCT_CACHE_SIZE,
+    ttl_seconds=settings.PRODUCT_CACHE_TTL_SECONDS or None,
+)
+metrics.register_collector("product_cache", _product_cache.stats)
+
+def product_content_hash(product: models.Product) -> str:
+    """
+    Stable hash of the text content we summarise / embed
+    (title, category, description, features). Price and URLs are left out
+    on purpose — changing them doesn't change what the product *is*.
+    """
+    payload = json.dumps(
+        [product.title, product.category, product.description, product.features],
+        sort_keys=True,
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def _not_found(product_id: int) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail=f"Product with id {product_id} not found",
+    )
 
 def get_product(db: Session, product_id: int) -> models.Product:
-    product = db.query(models.Product).filter(models.Product.id == product_id).first()
+    product = db.get(models.Product, product_id)
     if not product:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Product with id {product_id} not found",
-        )
+        raise _not_found(product_id)
     return product
 
+# Columns a list request may project to (`fields=`); ProductCard = CARD_FIELDS
+PROJECTABLE_FIELDS = ("id", "title", "price", "description", "features", "image_url", "category")
+CARD_FIELDS = ("id", "title", "price", "image_url", "category")
+
+def _select_products(columns: Optional[Sequence[str]]) -> Select:
+    """
+    SELECT only `columns` (id always included) — description / features
+    are the heavy ones and the grid doesn't need them. None = full rows.
+    Unloaded attributes must not be touched afterwards (no lazy loads
+    under AsyncSession).
+    """
+    stmt = select(models.Product)
+    if columns:
+        cols = dict.fromkeys(["id", *columns])
+        stmt = stmt.options(load_only(*(getattr(models.Product, c) for c in cols)))
+    return stmt
+
+def _list_stmt(
+    skip: int,
+    limit: int,
+    category: Optional[str],
+    columns: Optional[Sequence[str]] = None,
+) -> Select:
+    # Offset mode (kept for old clients) — ORDER BY id makes pages stable,
+    # but deep pages still cost O(offset); prefer keyset mode
+    stmt = _select_products(columns)
+    if category:
+        stmt = stmt.where(models.Product.category == category)
+    return stmt.order_by(models.Product.id).offset(skip).limit(limit)
+
 def list_products(
     db: Session,
     skip: int = 0,
     limit: int = 20,
     category: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
 ) -> List[models.Product]:
-    query = db.query(models.Product)
+    return list(db.execute(_list_stmt(skip, limit, category, columns)).scalars())
+
+def encode_cursor(last_id: int, category: Optional[str]) -> str:
+    raw = json.dumps({"id": last_id, "c": category}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str, category: Optional[str]) -> int:
+    """Last seen id from an opaque cursor; 400 if malformed or for another filter."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        last_id = int(data["id"])
+        cursor_category = data.get("c")
+    except (ValueError, KeyError, TypeError, binascii.Error):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor",
+        )
+    if cursor_category != category:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Cursor was issued for a different category filter",
+        )
+    return last_id
+
+def _keyset_stmt(
+    limit: int,
+    category: Optional[str],
+    cursor: Optional[str],
+    columns: Optional[Sequence[str]] = None,
+) -> Select:
+    """
+    Keyset pagination ordered by id (within the category if filtered):
+    `WHERE id > last_id ORDER BY id LIMIT n` is an index range scan on the
+    PK / (category, id) index, so page 500 costs the same as page 1.
+    """
+    stmt = _select_products(columns)
     if category:
-        query = query.filter(models.Product.category == category)
-    return query.offset(skip).limit(limit).all()
+        stmt = stmt.where(models.Product.category == category)
+    if cursor:
+        stmt = stmt.where(models.Product.id > decode_cursor(cursor, category))
+    # one extra row tells us whether another page exists
+    return stmt.order_by(models.Product.id).limit(limit + 1)
+
+def _keyset_page(
+    rows: List[models.Product],
+    limit: int,
+    category: Optional[str],
+) -> Tuple[List[models.Product], Optional[str]]:
+    items = rows[:limit]
+    next_cursor = encode_cursor(items[-1].id, category) if len(rows) > limit else None
+    return items, next_cursor
+
+def list_products_keyset(
+    db: Session,
+    limit: int = 20,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[models.Product], Optional[str]]:
+    """Returns (items, next_cursor); next_cursor is None on the last page."""
+    rows = list(db.execute(_keyset_stmt(limit, category, cursor, columns)).scalars())
+    return _keyset_page(rows, limit, category)
+
+def _product_columns(data: dict) -> dict:
+    """
+    Schema fields → Product columns: `url` is stored as product_url,
+    currency / external_id have no column on products.
+    """
+    columns = dict(data)
+    if "url" in columns:
+        columns["product_url"] = columns.pop("url")
+    columns.pop("currency", None)
+    columns.pop("external_id", None)
+    return columns
 
 def create_product(db: Session, product_in: ProductCreate) -> models.Product:
-    product = models.Product(**product_in.model_dump())
+    product = models.Product(**_product_columns(product_in.model_dump()))
     db.add(product)
+    db.flush()  # assigns product.id
+    # same transaction → Qdrant / KG re-index can't be lost (services/outbox.py)
+    outbox.enqueue_product_changes(db, [product.id])
     db.commit()
     db.refresh(product)
+    outbox.notify_worker()
     return product
 
 def update_product(
@@ -38,8 +181,108 @@ def update_product(
     product_in: ProductUpdate,
 ) -> models.Product:
     product = get_product(db, product_id)
-    for field, value in product_in.model_dump(exclude_unset=True).items():
+    for field, value in _product_columns(product_in.model_dump(exclude_unset=True)).items():
         setattr(product, field, value)
+    outbox.enqueue_product_changes(db, [product_id])
     db.commit()
     db.refresh(product)
+    _product_cache.invalidate([product_id])
+    outbox.notify_worker()
     return product
+
+# ---- async variants (AsyncSession / asyncpg), same behaviour ----
+
+async def get_product_async(db: AsyncSession, product_id: int) -> models.Product:
+    product = await db.get(models.Product, product_id)
+    if not product:
+        raise _not_found(product_id)
+    return product
+
+async def get_product_with_changed_at_async(
+    db: AsyncSession, product_id: int
+) -> Tuple[models.Product, Optional[datetime]]:
+    """Product + its aware last-change time (HTTP validators), one query."""
+    stmt = select(models.Product, http_cache.product_changed_at_tz()).where(
+        models.Product.id == product_id
+    )
+    row = (await db.execute(stmt)).one_or_none()
+    if row is None:
+        raise _not_found(product_id)
+    return row[0], row[1]
+
+async def list_products_async(
+    db: AsyncSession,
+    skip: int = 0,
+    limit: int = 20,
+    category: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> List[models.Product]:
+    result = await db.execute(_list_stmt(skip, limit, category, columns))
+    return list(result.scalars())
+
+async def list_products_keyset_async(
+    db: AsyncSession,
+    limit: int = 20,
+    category: Optional[str] = None,
+    cursor: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> Tuple[List[models.Product], Optional[str]]:
+    result = await db.execute(_keyset_stmt(limit, category, cursor, columns))
+    return _keyset_page(list(result.scalars()), limit, category)
+
+async def create_product_async(db: AsyncSession, product_in: ProductCreate) -> models.Product:
+    product = models.Product(**_product_columns(product_in.model_dump()))
+    db.add(product)
+    await db.flush()
+    outbox.enqueue_product_changes(db, [product.id])
+    await db.commit()
+    await db.refresh(product)
+    outbox.notify_worker()
+    return product
+
+async def update_product_async(
+    db: AsyncSession,
+    product_id: int,
+    product_in: ProductUpdate,
+) -> models.Product:
+    product = await get_product_async(db, product_id)
+    for field, value in _product_columns(product_in.model_dump(exclude_unset=True)).items():
+        setattr(product, field, value)
+    outbox.enqueue_product_changes(db, [product_id])
+    await db.commit()
+    await db.refresh(product)
+    _product_cache.invalidate([product_id])
+    outbox.notify_worker()
+    return product
+
+async def get_products_batch_async(
+    db: AsyncSession,
+    ids: List[int],
+) -> Tuple[List[ProductOut], List[int]]:
+    """
+    Many products in one round trip: hot-cache hits first, then a single
+    `WHERE id IN (...)` for the rest. Returns (products in requested
+    order, duplicates collapsed; ids that don't exist).
+    """
+    wanted = list(dict.fromkeys(ids))
+    found: dict[int, ProductOut] = {}
+    misses: List[int] = []
+    for pid in wanted:
+        cached = _product_cache.get(pid)
+        if cached is None:
+            misses.append(pid)
+        else:
+            found[pid] = cached
+
+    if misses:
+        result = await db.execute(
+            select(models.Product).where(models.Product.id.in_(misses))
+        )
+        for product in result.scalars():
+            out = ProductOut.model_validate(product)
+            _product_cache.set(product.id, out)
+            found[product.id] = out
+
+    items = [found[pid] for pid in wanted if pid in found]
+    missing = [pid for pid in wanted if pid not in found]
+    return items, missing
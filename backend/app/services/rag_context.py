@@ -0,0 +1,112 @@
+# app/services/rag_context.py
+"""
+Token-budgeted RAG context builder.
+
+One compact record per product (vector payload + KG facts merged),
+ordered by score, added until the token budget is used up. Prompt size
+drives LLM latency and cost, so every token here should earn its place.
+"""
+from typing import Dict, List, Optional, Tuple
+import re
+
+from app.core.config import settings
+from app.schemas.search import SearchHit
+
+try:  # optional: exact BPE counts when tiktoken is installed
+    import tiktoken
+
+    _encoding = tiktoken.get_encoding("cl100k_base")
+except Exception:  # not installed / encoding file unavailable offline
+    _encoding = None
+
+# Fallback tokenizer: words, numbers and single punctuation marks.
+# Slightly under-counts vs. BPE, so we scale it a bit.
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+_FALLBACK_SCALE = 1.3
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally (tiktoken if available, regex estimate otherwise)."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text))
+    return int(len(_TOKEN_RE.findall(text)) * _FALLBACK_SCALE) + 1
+
+
+def _truncate(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    if len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return cut + "…"
+
+
+def _format_record(
+    prod: SearchHit,
+    kg_text: Optional[str],
+    include_about: bool = True,
+) -> str:
+    header = f"[ID {prod.id}] {prod.title}"
+    meta: List[str] = []
+    if prod.category:
+        meta.append(f"Category: {prod.category}")
+    if prod.price is not None:
+        meta.append(f"Price: ₹{prod.price:g}")
+
+    lines = [header]
+    if meta:
+        lines.append(" | ".join(meta))
+    if kg_text:
+        lines.append(kg_text)
+    if include_about:
+        # Precomputed stylist summary is short and to the point; fall back
+        # to a truncated raw description for products not summarised yet
+        if prod.summary:
+            lines.append(f"About: {prod.summary}")
+        elif prod.description:
+            lines.append(
+                f"About: {_truncate(prod.description, settings.RAG_DESCRIPTION_MAX_CHARS)}"
+            )
+    return "\n".join(lines)
+
+
+def build_rag_context(
+    products: List[SearchHit],
+    kg_context: Dict[int, str],
+    token_budget: Optional[int] = None,
+) -> Tuple[List[str], int]:
+    """
+    Build RAG chunks from search hits.
+
+    - products: search hits; duplicates by id are collapsed, best score wins
+    - kg_context: {product_id: compact KG text} from the graph service
+    - token_budget: defaults to settings.RAG_CONTEXT_TOKEN_BUDGET
+
+    Returns (chunks, tokens_used). A record that doesn't fit is retried
+    without its description before we give up on it.
+    """
+    budget = token_budget or settings.RAG_CONTEXT_TOKEN_BUDGET
+
+    best: Dict[int, SearchHit] = {}
+    for prod in products:
+        if prod.id not in best or prod.score > best[prod.id].score:
+            best[prod.id] = prod
+
+    ordered = sorted(best.values(), key=lambda p: p.score, reverse=True)
+
+    chunks: List[str] = []
+    used = 0
+    for prod in ordered:
+        kg_text = kg_context.get(prod.id)
+        for include_about in (True, False):
+            record = _format_record(prod, kg_text, include_about=include_about)
+            cost = count_tokens(record)
+            if used + cost <= budget:
+                chunks.append(record)
+                used += cost
+                break
+        if budget - used < 20:  # not even a header fits any more
+            break
+
+    return chunks, used
@@ -1,9 +1,9 @@
 # app/services/scraper.py
 
 from typing import Dict, Tuple, List
-from datetime import datetime
 
 from fastapi import HTTPException as FastAPIHTTPException
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 
 from Data_Scraping.scrap import (
@@ -75,7 +75,9 @@ def scrape_hunnit_to_db(
                 total_skipped += 1
                 continue
 
-            now = datetime.utcnow()
+            # DB clock, like the column defaults (naive UTC here would be
+            # off by the server's UTC offset next to now()-filled rows)
+            now = func.now()
 
             # Upsert based on product_url
             existing = (
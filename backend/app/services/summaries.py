@@ -0,0 +1,175 @@
+# app/services/summaries.py
+"""
+Offline precomputation of short stylist summaries per product.
+
+Full descriptions make RAG prompts (and completions) slow, so a batch job
+asks the configured LLM chain once per product for a 1–2 sentence,
+stylist-oriented summary. It is stored on the product row and in the
+Qdrant payload, and the RAG context builder prefers it over the raw
+description.
+
+The job is resumable: a product is only (re)summarised when its content
+hash differs from `summary_hash`, and every batch is committed, so an
+interrupted run simply continues where it stopped.
+"""
+from typing import Dict, List, Optional
+import logging
+import time
+
+from qdrant_client.http import models as qmodels
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.product import Product
+from app.services.embeddings import get_qdrant
+from app.services.llm import CircuitOpenError, llm_manager
+from app.services.products import product_content_hash
+
+logger = logging.getLogger(__name__)
+
+
+def _summary_prompt(product: Product) -> str:
+    if isinstance(product.features, dict):
+        feats = "; ".join(
+            f"{k}: {', '.join(map(str, v)) if isinstance(v, list) else v}"
+            for k, v in product.features.items()
+        )
+    elif isinstance(product.features, list):
+        feats = "; ".join(map(str, product.features))
+    else:
+        feats = product.features or ""
+
+    return (
+        "Write a stylist's summary of this clothing product in at most "
+        f"{settings.SUMMARY_MAX_WORDS} words: what it is, fit/fabric, and when "
+        "to wear it. No price, no marketing fluff, plain text only.\n\n"
+        f"Title: {product.title}\n"
+        f"Category: {product.category or ''}\n"
+        f"Description: {product.description or ''}\n"
+        f"Features: {feats}"
+    )
+
+
+class _RateLimiter:
+    """Spaces calls evenly: at most `per_minute` calls per minute."""
+
+    def __init__(self, per_minute: int):
+        self.interval = 60.0 / per_minute if per_minute > 0 else 0.0
+        self._next_at = 0.0
+
+    def wait(self) -> None:
+        now = time.monotonic()
+        if now < self._next_at:
+            time.sleep(self._next_at - now)
+        self._next_at = max(now, self._next_at) + self.interval
+
+
+def _push_summaries_to_qdrant(summaries: Dict[int, str]) -> None:
+    if not summaries:
+        return
+    client = get_qdrant()
+    client.batch_update_points(
+        collection_name=settings.QDRANT_COLLECTION,
+        update_operations=[
+            qmodels.SetPayloadOperation(
+                set_payload=qmodels.SetPayload(
+                    payload={"stylist_summary": text},
+                    points=[pid],
+                )
+            )
+            for pid, text in summaries.items()
+        ],
+    )
+
+
+def precompute_stylist_summaries(
+    db: Session,
+    limit: Optional[int] = None,
+    batch_size: Optional[int] = None,
+    rate_per_minute: Optional[int] = None,
+    force: bool = False,
+    update_qdrant: bool = True,
+) -> Dict[str, int]:
+    """
+    Summarise every product whose content changed since its last summary.
+
+    - limit: stop after this many new summaries (None = all)
+    - force: ignore summary_hash and regenerate everything
+    - update_qdrant: also patch the `stylist_summary` payload field
+
+    Returns counters: {"checked", "summarized", "unchanged", "failed"}.
+    """
+    batch_size = batch_size or settings.SUMMARY_BATCH_SIZE
+    limiter = _RateLimiter(rate_per_minute or settings.SUMMARY_RATE_PER_MINUTE)
+    stats = {"checked": 0, "summarized": 0, "unchanged": 0, "failed": 0}
+
+    products: List[Product] = db.query(Product).order_by(Product.id).all()
+    pending: List[Product] = []
+    for p in products:
+        stats["checked"] += 1
+        if not force and p.stylist_summary and p.summary_hash == product_content_hash(p):
+            stats["unchanged"] += 1
+            continue
+        pending.append(p)
+
+    if limit is not None:
+        pending = pending[:limit]
+
+    print(
+        f"📝 Stylist summaries: {len(pending)} to generate, "
+        f"{stats['unchanged']} up to date"
+    )
+
+    for start in range(0, len(pending), batch_size):
+        batch = pending[start:start + batch_size]
+        done: Dict[int, str] = {}
+
+        stop_early = False
+        for p in batch:
+            limiter.wait()
+            try:
+                text = llm_manager.complete(_summary_prompt(p))
+            except CircuitOpenError:
+                # Every provider is down — stop; the next run resumes here
+                print("⚠️ LLM providers unavailable — stopping summary job early.")
+                stop_early = True
+                break
+            except Exception as e:
+                logger.error(f"Summary failed for product {p.id}: {e}")
+                stats["failed"] += 1
+                continue
+
+            text = " ".join(text.split())
+            if not text:
+                stats["failed"] += 1
+                continue
+            # Core UPDATE that keeps updated_at as is: the ORM's
+            # onupdate=now() would otherwise mark every summarised product
+            # as changed (full KG re-merge past the watermark, ETag churn)
+            db.execute(
+                update(Product)
+                .where(Product.id == p.id)
+                .values(
+                    stylist_summary=text,
+                    summary_hash=product_content_hash(p),
+                    updated_at=Product.updated_at,
+                )
+            )
+            done[p.id] = text
+
+        db.commit()
+        if update_qdrant:
+            try:
+                _push_summaries_to_qdrant(done)
+            except Exception as e:
+                # DB is the source of truth; the next full re-index fixes Qdrant
+                logger.error(f"Qdrant summary payload update failed: {e}")
+        stats["summarized"] += len(done)
+        metrics.inc("summaries.generated", len(done))
+        print(f"   … {stats['summarized']}/{len(pending)} summaries done")
+        if stop_early:
+            break
+
+    return stats
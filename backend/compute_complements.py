@@ -0,0 +1,33 @@
+# compute_complements.py
+"""
+Batch job: recompute "complete the look" suggestions for every product.
+
+    python compute_complements.py            # default top-N from settings
+    python compute_complements.py --top-n 10
+
+Replaces the whole product_complements table; re-run after big catalog
+changes (e.g. after a scrape).
+"""
+import argparse
+
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.services.complements import rebuild_product_complements
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top-n", type=int, default=None)
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        stats = rebuild_product_complements(db, top_n=args.top_n)
+    finally:
+        db.close()
+    print(f"✨ Done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
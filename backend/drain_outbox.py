@@ -0,0 +1,34 @@
+# drain_outbox.py
+"""
+Index pending product_outbox events (Qdrant + KG) and exit.
+
+    python drain_outbox.py
+
+For deployments that run the API with OUTBOX_WORKER_ENABLED=false and
+drain from a separate process / cron instead. Dead-lettered events
+(OUTBOX_MAX_ATTEMPTS used up) are reported, not retried.
+"""
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.services.outbox import outbox_lag, process_outbox_batch
+
+
+def main() -> None:
+    run_migrations(engine)
+    db = SessionLocal()
+    totals = {"claimed": 0, "indexed": 0, "removed": 0, "failed": 0}
+    try:
+        while True:
+            stats = process_outbox_batch(db)
+            if not stats["claimed"]:
+                break
+            for key, value in stats.items():
+                totals[key] += value
+        lag = outbox_lag(db)
+    finally:
+        db.close()
+    print(f"✨ Done: {totals}, still pending (backing off): {lag['pending']}, dead: {lag['dead']}")
+
+
+if __name__ == "__main__":
+    main()
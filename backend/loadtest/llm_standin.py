@@ -0,0 +1,141 @@
+# loadtest/llm_standin.py
+"""
+Local OpenAI-compatible LLM stand-in for load tests and benchmarks.
+
+Answers are deterministic (built from the products listed in the prompt),
+latency follows a configurable distribution, and `stream=True` returns
+SSE token chunks just like the real APIs. Point the backend at it with:
+
+    uvicorn loadtest.llm_standin:app --port 8099
+    LLM_PROVIDERS=standin LLM_STANDIN_URL=http://127.0.0.1:8099/v1 uvicorn app.main:app
+
+Env knobs:
+    STANDIN_LATENCY      fixed:0.4 | uniform:0.2,1.5 | lognormal:-0.7,0.5
+                         | bimodal:0.3,4.0,0.1  (fast, slow, p_slow)
+    STANDIN_TOKEN_DELAY  seconds between streamed tokens (default 0.02)
+    STANDIN_ERROR_RATE   fraction of requests answered with HTTP 503
+    STANDIN_SEED         RNG seed for the latency / error sampling
+"""
+from typing import Any, Dict, Iterator, List
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, StreamingResponse
+
+app = FastAPI(title="LLM stand-in (OpenAI compatible)")
+
+_rng = random.Random(int(os.getenv("STANDIN_SEED", "42")))
+LATENCY_SPEC = os.getenv("STANDIN_LATENCY", "fixed:0.4")
+TOKEN_DELAY = float(os.getenv("STANDIN_TOKEN_DELAY", "0.02"))
+ERROR_RATE = float(os.getenv("STANDIN_ERROR_RATE", "0"))
+
+RECORD_RE = re.compile(r"^\[ID (\d+)\] (.+)$", re.MULTILINE)
+
+
+def sample_latency(spec: str = LATENCY_SPEC) -> float:
+    """Draw one response latency (seconds) from the configured distribution."""
+    kind, _, raw = spec.partition(":")
+    args = [float(x) for x in raw.split(",") if x]
+    if kind == "fixed":
+        return args[0]
+    if kind == "uniform":
+        return _rng.uniform(args[0], args[1])
+    if kind == "lognormal":
+        return _rng.lognormvariate(args[0], args[1])
+    if kind == "bimodal":
+        fast, slow, p_slow = args
+        return slow if _rng.random() < p_slow else fast
+    raise ValueError(f"Unknown STANDIN_LATENCY distribution: {spec}")
+
+
+def build_answer(messages: List[Dict[str, Any]], json_mode: bool = False) -> str:
+    """
+    Deterministic stylist answer from the `[ID n] Title` records in the
+    prompt. In JSON mode it mimics the structured payload the backend asks
+    for: {"answer": ..., "product_ids": [...]}.
+    """
+    prompt = "\n".join(str(m.get("content") or "") for m in messages)
+    picks = RECORD_RE.findall(prompt)[:3]
+    if not picks:
+        text = "Tell me a bit more about what you're looking for!"
+    else:
+        names = ", ".join(title.strip() for _, title in picks)
+        text = f"You could try: {names}. They match your request nicely."
+    if json_mode:
+        return json.dumps({"answer": text, "product_ids": [int(pid) for pid, _ in picks]})
+    return text
+
+
+def _usage(messages: List[Dict[str, Any]], answer: str) -> Dict[str, int]:
+    prompt_tokens = sum(len(str(m.get("content") or "").split()) for m in messages)
+    completion_tokens = len(answer.split())
+    return {
+        "prompt_tokens": prompt_tokens,
+        "completion_tokens": completion_tokens,
+        "total_tokens": prompt_tokens + completion_tokens,
+    }
+
+
+def _stream_chunks(model: str, answer: str, created: int) -> Iterator[str]:
+    base = {"id": f"standin-{created}", "object": "chat.completion.chunk",
+            "created": created, "model": model}
+    for i, token in enumerate(re.findall(r"\S+\s*", answer)):
+        delta = {"content": token} if i else {"role": "assistant", "content": token}
+        yield "data: " + json.dumps(
+            {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        ) + "\n\n"
+    yield "data: " + json.dumps(
+        {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+    ) + "\n\n"
+    yield "data: [DONE]\n\n"
+
+
+@app.get("/v1/models")
+def list_models():
+    return {"object": "list", "data": [{"id": "standin", "object": "model"}]}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(body: Dict[str, Any]):
+    # Time to first byte follows the configured distribution
+    await asyncio.sleep(sample_latency())
+
+    if ERROR_RATE and _rng.random() < ERROR_RATE:
+        return JSONResponse(
+            status_code=503,
+            content={"error": {"message": "stand-in injected failure", "type": "server_error"}},
+        )
+
+    model = body.get("model") or "standin"
+    messages = body.get("messages") or []
+    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+    answer = build_answer(messages, json_mode=json_mode)
+    created = int(time.time())
+
+    if body.get("stream"):
+        async def gen():
+            for chunk in _stream_chunks(model, answer, created):
+                yield chunk
+                await asyncio.sleep(TOKEN_DELAY)
+
+        return StreamingResponse(gen(), media_type="text/event-stream")
+
+    return {
+        "id": f"standin-{created}",
+        "object": "chat.completion",
+        "created": created,
+        "model": model,
+        "choices": [
+            {
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop",
+            }
+        ],
+        "usage": _usage(messages, answer),
+    }
@@ -0,0 +1,80 @@
+# loadtest/search_load.py
+"""
+Minimal closed-loop load generator for POST /api/v1/search.
+
+    python -m loadtest.search_load --url http://127.0.0.1:8000/api/v1 \\
+        --concurrency 16 --requests 400
+
+Run the backend with LLM_PROVIDERS=standin to keep it fully offline.
+"""
+from typing import List
+import argparse
+import itertools
+import statistics
+import threading
+import time
+
+import httpx
+
+QUERIES = [
+    "show me oversized hoodies under 2000",
+    "gym shorts for running",
+    "black tshirt for summer",
+    "co-ord set for travel",
+    "winter jacket under 3000",
+]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8000/api/v1")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200)
+    args = parser.parse_args()
+
+    latencies: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+    counter = itertools.count()
+    queries = itertools.cycle(QUERIES)
+
+    def worker() -> None:
+        nonlocal errors
+        with httpx.Client(base_url=args.url, timeout=60) as client:
+            while next(counter) < args.requests:
+                with lock:
+                    query = next(queries)
+                start = time.perf_counter()
+                try:
+                    r = client.post("/search", json={"query": query})
+                    ok = r.status_code == 200
+                except httpx.HTTPError:
+                    ok = False
+                elapsed = time.perf_counter() - start
+                with lock:
+                    latencies.append(elapsed)
+                    if not ok:
+                        errors += 1
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker) for _ in range(args.concurrency)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    lat = sorted(latencies)
+    if not lat:
+        print("No requests sent.")
+        return
+    print(f"requests={len(lat)} errors={errors} wall={wall:.1f}s rps={len(lat) / wall:.1f}")
+    print(
+        f"latency ms: p50={lat[len(lat) // 2] * 1000:.0f} "
+        f"p95={lat[int(len(lat) * 0.95) - 1] * 1000:.0f} "
+        f"max={lat[-1] * 1000:.0f} mean={statistics.mean(lat) * 1000:.0f}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+# loadtest/serialization_bench.py
+"""
+Micro-benchmark: JSON rendering of product-list and search responses.
+
+    python -m loadtest.serialization_bench --products 100 --rounds 300
+
+No DB / network: builds in-memory Product rows with a realistic nested
+`features` dict and times each rendering path end to end (model
+validation included where the endpoint does it).
+"""
+from typing import Any, Callable, Dict, List
+import argparse
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+
+from app.core.responses import ORJSONResponse, orjson
+from app.models.product import Product
+from app.schemas.product import ProductOut
+from app.schemas.search import SearchHit
+
+_FEATURES = {
+    "product_features": ["Oversized fit", "Drop shoulder", "Kangaroo pocket", "Ribbed cuffs"],
+    "fabric_features": ["100% cotton", "Brushed fleece", "320 GSM"],
+    "function": ["Gym", "Travel", "Layering"],
+}
+
+
+def _products(n: int) -> List[Product]:
+    return [
+        Product(
+            id=i,
+            title=f"Oversized Fleece Hoodie {i}",
+            price=1999.0 + i,
+            description="Heavyweight brushed fleece hoodie with a relaxed drop-shoulder fit. " * 6,
+            features=_FEATURES,
+            image_url=f"https://cdn.example.com/products/{i}.jpg",
+            category="Hoodies",
+            product_url=f"https://example.com/products/{i}",
+        )
+        for i in range(n)
+    ]
+
+
+def _stdlib_json(content: Any) -> bytes:
+    # what fastapi.responses.JSONResponse does after jsonable_encoder
+    return json.dumps(
+        content, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def _time(fn: Callable[[], bytes], rounds: int) -> float:
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    return (time.perf_counter() - start) / rounds
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=300)
+    args = parser.parse_args()
+
+    if orjson is None:
+        print("⚠️ orjson not installed — ORJSONResponse uses its stdlib fallback")
+
+    rows = _products(args.products)
+    page = TypeAdapter(List[ProductOut])
+    render = ORJSONResponse(None).render
+
+    hit_dicts: List[Dict[str, Any]] = [
+        {
+            "id": p.id,
+            "title": p.title,
+            "category": p.category,
+            "price": p.price,
+            "description": p.description,
+            "summary": "",
+            "image_url": p.image_url,
+            "product_url": p.product_url,
+            "score": 0.5,
+        }
+        for p in rows
+    ]
+    hits = [SearchHit(**d) for d in hit_dicts]
+
+    cases = {
+        # response_model route under the default JSONResponse
+        "list  | validate + dump(mode=json) + json": lambda: _stdlib_json(
+            page.dump_python(page.validate_python(rows, from_attributes=True), mode="json")
+        ),
+        "list  | validate + ORJSONResponse": lambda: render(
+            page.dump_python(page.validate_python(rows, from_attributes=True))
+        ),
+        "fields| jsonable_encoder + json": lambda: _stdlib_json(
+            jsonable_encoder([{"id": p.id, "title": p.title, "features": p.features} for p in rows])
+        ),
+        "fields| ORJSONResponse": lambda: render(
+            [{"id": p.id, "title": p.title, "features": p.features} for p in rows]
+        ),
+        "search| dict hits + jsonable_encoder + json": lambda: _stdlib_json(
+            jsonable_encoder({"answer": "…", "results": hit_dicts})
+        ),
+        "search| SearchHit + ORJSONResponse": lambda: render(
+            {"answer": "…", "results": hits}
+        ),
+    }
+
+    timings = {name: _time(fn, args.rounds) for name, fn in cases.items()}
+    print(f"{args.products} products, {args.rounds} rounds (mean per response):")
+    baseline = None
+    for name, seconds in timings.items():
+        if "ORJSON" not in name:
+            baseline = seconds
+            print(f"  {name:<46} {seconds * 1e6:8.0f} µs")
+        else:
+            print(f"  {name:<46} {seconds * 1e6:8.0f} µs  ({baseline / seconds:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
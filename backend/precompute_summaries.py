@@ -0,0 +1,44 @@
+# precompute_summaries.py
+"""
+Batch job: precompute short stylist summaries for all products.
+
+    python precompute_summaries.py                # only new / changed products
+    python precompute_summaries.py --limit 50     # small run
+    python precompute_summaries.py --force        # regenerate everything
+
+Safe to interrupt and re-run (resumes via content hashes).
+"""
+import argparse
+
+from app.db.migrations import run_migrations
+from app.db.session import SessionLocal, engine
+from app.services.summaries import precompute_stylist_summaries
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--limit", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=None)
+    parser.add_argument("--rate-per-minute", type=int, default=None)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--no-qdrant", action="store_true")
+    args = parser.parse_args()
+
+    run_migrations(engine)
+    db = SessionLocal()
+    try:
+        stats = precompute_stylist_summaries(
+            db,
+            limit=args.limit,
+            batch_size=args.batch_size,
+            rate_per_minute=args.rate_per_minute,
+            force=args.force,
+            update_qdrant=not args.no_qdrant,
+        )
+    finally:
+        db.close()
+    print(f"✨ Done: {stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+# tests/test_kg_candidates_profile.py
+"""
+The KG candidate lookups (graph.py) must stay index-backed: PROFILE every
+lookup against a live Neo4j and fail on any full label scan.
+
+Needs a reachable Neo4j (NEO4J_URI / NEO4J_PASSWORD) plus the app's usual
+settings (.env); skipped otherwise. Writes a few throwaway products with
+ids far above the real catalog and deletes them again.
+"""
+import os
+
+import pytest
+
+if not (os.getenv("NEO4J_URI") and os.getenv("NEO4J_PASSWORD")):
+    pytest.skip("Neo4j not configured (NEO4J_URI / NEO4J_PASSWORD)", allow_module_level=True)
+
+from app.models.product import Product  # noqa: E402
+from app.services import graph  # noqa: E402
+
+_FULL_SCANS = {"NodeByLabelScan", "AllNodesScan"}
+_TEST_IDS = range(990_000_001, 990_000_006)
+
+
+@pytest.fixture(scope="module")
+def synced_products():
+    if graph.kg_backend() != "neo4j":
+        pytest.skip("KG backend is not Neo4j (KG_BACKEND / NEO4J_ENABLED)")
+    products = [
+        Product(
+            id=pid,
+            title=f"Oversized Fleece Hoodie {i}",
+            price=1499.0 + 250 * i,
+            category="Hoodies" if i % 2 else "Joggers",
+            description="Relaxed winter layering piece.",
+            features={"fabric_features": ["Cotton"], "product_features": ["Oversized fit"]},
+        )
+        for i, pid in enumerate(_TEST_IDS)
+    ]
+    graph.ensure_schema()
+    graph.upsert_products_to_graph(products)
+    yield products
+    graph.delete_products_from_graph(list(_TEST_IDS))
+    graph.close_neo4j_driver()
+
+
+def test_candidate_lookups_use_indexes(synced_products):
+    plans = graph.profile_candidate_lookup(
+        category_hint="hoodie", max_price=2000, tags=["oversized", "winter"]
+    )
+
+    assert set(plans) == {"category", "tags", "price_only", "price_filter"}
+    for name, operators in plans.items():
+        assert operators, f"{name}: empty PROFILE plan"
+        assert not _FULL_SCANS & set(operators), f"{name} plan scans: {operators}"
+
+
+def test_candidate_lookup_finds_synced_products(synced_products):
+    ids = graph.get_candidate_product_ids_from_kg("hoodie", 2000, ["oversized"])
+
+    assert set(_TEST_IDS) & set(ids)
@@ -18,7 +18,8 @@ const HomePage = () => {
       try {
         setStatus("loading");
 
-        const res = await fetch(`${API_BASE_URL}/products/`);
+        // compact card view: only the columns the grid shows
+        const res = await fetch(`${API_BASE_URL}/products/?view=card`);
 
         if (!res.ok) {
           const text = await res.text();